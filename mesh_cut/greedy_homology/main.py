@@ -11,7 +11,7 @@ Greedy Homology Basis Genarator
 """
 
 from mesh_cut.greedy_homology.homology_opt import HomologyBasisOptimizer
-from mesh_cut.greedy_homology.annotator import Annotator
+from mesh_cut.greedy_homology.annotator import TreeCotreeAnnotator
 from mesh_cut.greedy_homology.graphbase import GraphBase
 import openmesh as om
 import numpy as np
@@ -86,7 +86,7 @@ def main(options):
 
    logger.info("Constructing GraphBase..")
    graphBase = GraphBase.from_openmesh(mesh)
-   annotator = Annotator(graphBase)
+   annotator = TreeCotreeAnnotator(graphBase)
 
    logger.info("Calculating annotation..")
    annotation, null_vector = annotator.compute_annotation()
@@ -1,5 +1,6 @@
 from mesh_cut.greedy_homology.graphbase import *
-from mesh_cut.greedy_homology.annotator import Annotator
+from mesh_cut.greedy_homology.annotator import Annotator, TreeCotreeAnnotator
+from mesh_cut.greedy_homology.homology_opt import HomologyBasisOptimizer
 import unittest
 import openmesh as om
 
@@ -20,4 +21,28 @@ class AnnotatorTest(unittest.TestCase):
 
         annotation, null_vector = annotator.compute_annotation()
 
-        print(annotation)
\ No newline at end of file
+        print(annotation)
+
+    def test_tree_cotree_annotation(self):
+        lengths = []
+        for annotator_cls in (Annotator, TreeCotreeAnnotator):
+            graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+            annotation, null_vector = annotator_cls(graphBase).compute_annotation()
+            self.assertEqual(null_vector.shape, (2 * graphBase.genus,))
+
+            graphBase.set_annotation(annotation, null_vector)
+            cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+            lengths.append([cycle[0] for cycle in cycles])
+
+        self.assertTrue(np.allclose(lengths[0], lengths[1]))
+
+    def test_annotation_edges(self):
+        for annotator_cls in (Annotator, TreeCotreeAnnotator):
+            graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+            annotation, null_vector = annotator_cls(graphBase).compute_annotation()
+
+            edges = sorted(graphBase.edge_lookup.keys())[::3]
+            edge_annotation, _ = annotator_cls(graphBase).compute_annotation(edges=edges)
+            self.assertTrue(set(edge_annotation.keys()) <= set(edges))
+            for e in edges:
+                self.assertTrue((annotation.get(e, null_vector) == edge_annotation.get(e, null_vector)).all())
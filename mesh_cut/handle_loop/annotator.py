@@ -1,4 +1,4 @@
-from .linalg import check_z2, get_Bopt_column, solve_z2_sequential
+from .linalg import check_z2, get_Bopt_column, solve_z2_sequential, unpack_z2_vector
 from .sp_tree import SpanningTree
 from .graphbase import GraphBase
 import numpy as np
@@ -62,10 +62,18 @@ class Annotator:
 
         return z_tilde, dim_h1
 
-    def compute_annotation(self):
+    def check_edges(self, edges):
+        missing_edges = [e for e in edges if e not in self.graphBase.edge_lookup]
+        if len(missing_edges) > 0:
+            raise Exception(f"{len(missing_edges)} edges are not in the complex.")
+
+    def compute_annotation(self, edges=None):
         """Returns (annotation, annotation_null_vector) tuple
         annotation[(vs, vd)] is not None if have non-null annotation
         (where vs < vd)
+
+        edges: if given, only these (vs, vd) are annotated, e.g. the edges
+        of a surface embedded in this complex
         """
 
         sp_tree = SpanningTree(self.graphBase)
@@ -84,6 +92,16 @@ class Annotator:
         
         logger.info(f"H1 basis dimension: {dim_h1}")
 
+        if edges is not None:
+            self.check_edges(edges)
+
+            # tree edges are null, other edges are expressed through the tree
+            residual_idx = {e: idx for idx, e in enumerate(residual_edges)}
+            columns = [residual_idx[e] for e in edges if e in residual_idx]
+            residual_edges = [residual_edges[idx] for idx in columns]
+            cycle_basis = cycle_basis[:, columns]
+
+        logger.info(f"Solving coordinates for {len(residual_edges)} residual edges")
         coord_mat = solve_z2_sequential(z_tilde, cycle_basis)
         annotation_dict = {}
 
@@ -92,4 +110,85 @@ class Annotator:
             annotation_dict[(vs, vd)] = h1_coeff
         
         annotation_null_vector = np.zeros((dim_h1,), dtype=np.int8)
-        return (annotation_dict, annotation_null_vector)
\ No newline at end of file
+        return (annotation_dict, annotation_null_vector)
+
+class TreeCotreeAnnotator(Annotator):
+    """Annotation of closed surfaces by tree-cotree decomposition, no matrices involved
+
+    T: spanning tree of the primal graph, C: spanning tree of the dual graph
+    using edges not in T, the 2g leftover edges L give the H1 basis.
+    Every face boundary must annotate to zero, so walking C from its leaves
+    the annotation of each cotree edge is the sum of the other two edges of its face.
+    """
+    def compute_annotation(self, edges=None):
+        """edges: if given, only these (vs, vd) are annotated"""
+        graphBase = self.graphBase
+        if edges is not None:
+            self.check_edges(edges)
+
+        sp_tree = SpanningTree(graphBase)
+        sp_tree.build_mst()
+
+        in_tree = sp_tree.tree_edge_mask
+
+        # edge -> the (two) faces it bounds
+        fe_indices = np.asarray(graphBase.fe_indices).tolist()
+        edge_faces = [[] for _ in range(0, graphBase.n_edges)]
+        for f_idx, face_edges in enumerate(fe_indices):
+            for e_idx in face_edges:
+                edge_faces[e_idx].append(f_idx)
+
+        # BFS over the dual graph, crossing non-tree edges only
+        in_cotree = np.zeros(graphBase.n_edges, dtype=bool)
+        parent_edge = [-1] * graphBase.n_faces
+        visited = [False] * graphBase.n_faces
+        visited[0] = True
+        bfs_order = [0]
+        for f_idx in bfs_order:
+            for e_idx in fe_indices[f_idx]:
+                if in_tree[e_idx] or in_cotree[e_idx]:
+                    continue
+                if len(edge_faces[e_idx]) != 2:
+                    raise Exception("Mesh is not a closed manifold.")
+                for f_neigh in edge_faces[e_idx]:
+                    if not visited[f_neigh]:
+                        visited[f_neigh] = True
+                        parent_edge[f_neigh] = e_idx
+                        in_cotree[e_idx] = True
+                        bfs_order.append(f_neigh)
+
+        if len(bfs_order) != graphBase.n_faces:
+            raise Exception("Mesh not connected.")
+
+        leftover_edges = np.flatnonzero(~in_tree & ~in_cotree)
+        dim_h1 = len(leftover_edges)
+        logger.info(f"H1 basis dimension: {dim_h1}")
+        assert(dim_h1 == 2 * graphBase.genus)
+
+        # packed annotation per edge, tree edges stay null
+        edge_annotation = [0] * graphBase.n_edges
+        for i, e_idx in enumerate(leftover_edges):
+            edge_annotation[e_idx] = 1 << i
+
+        for f_idx in reversed(bfs_order[1:]):
+            e_parent = parent_edge[f_idx]
+            word = 0
+            for e_idx in fe_indices[f_idx]:
+                if e_idx != e_parent:
+                    word ^= edge_annotation[e_idx]
+            edge_annotation[e_parent] = word
+
+        root_word = 0
+        for e_idx in fe_indices[0]:
+            root_word ^= edge_annotation[e_idx]
+        assert(root_word == 0)
+
+        annotation_dict = {}
+        for e_idx in np.flatnonzero(~in_tree).tolist():
+            annotation_dict[graphBase.rev_edge_lookup[e_idx]] = \
+                unpack_z2_vector(edge_annotation[e_idx], dim_h1)
+        if edges is not None:
+            annotation_dict = {e: annotation_dict[e] for e in edges if e in annotation_dict}
+
+        annotation_null_vector = np.zeros((dim_h1,), dtype=np.int8)
+        return (annotation_dict, annotation_null_vector)
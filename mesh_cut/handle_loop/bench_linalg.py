@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark Z_2 elimination routines
+
+python -m mesh_cut.handle_loop.bench_linalg [m n density [k]]
+"""
+
+from mesh_cut.handle_loop.linalg import get_Bopt_column_rowwise, get_Bopt_column_m4ri, M4RI_K
+import numpy as np
+import time
+import sys
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main(options):
+    if len(options) not in (0, 3, 4):
+        print(f"Options: [m n density [k]]")
+        sys.exit(1)
+
+    if len(options) == 0:
+        sizes = [(256, 512, 0.05), (1024, 2048, 0.01), (2048, 4096, 0.005)]
+    else:
+        sizes = [(int(options[0]), int(options[1]), float(options[2]))]
+    k = int(options[3]) if len(options) == 4 else M4RI_K
+
+    rng = np.random.default_rng(0)
+    for m, n, density in sizes:
+        A = (rng.random((m, n)) < density).astype(np.int8)
+
+        pivots_m4ri, t_m4ri = timed(get_Bopt_column_m4ri, A, k)
+        pivots_rowwise, t_rowwise = timed(get_Bopt_column_rowwise, A)
+        assert(pivots_m4ri == pivots_rowwise)
+
+        print(f"{m}x{n} density={density} rank={len(pivots_m4ri)}: "
+              f"rowwise {t_rowwise:.3f}s, m4ri(k={k}) {t_m4ri:.3f}s, "
+              f"speedup {t_rowwise / t_m4ri:.1f}x")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,137 @@
+import logging
+import os
+import pickle
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+class CandidatePool:
+    """Shortest candidate cycle per nonzero homology class,
+    keyed by packed annotation (see linalg.pack_z2_vector)"""
+    def __init__(self, spill_threshold: int = None, spill_dir: str = None):
+        """
+        spill_threshold: when more cycles than this are held in memory, they are written
+        to a temporary directory in spill_dir and merged back in cycles(); the best
+        length of every class stays in memory, so dominated cycles are still rejected
+        """
+        # annotation key -> (cycle_length, seq, cycle), the cycles not spilled yet
+        self.pool = {}
+        # annotation key -> (cycle_length, seq) of the kept cycle, spilled ones included
+        self.best = {}
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.spill_tempdir = None
+        self.spill_files = []
+
+        # offer order, used to break ties between equally long cycles
+        self.seq = 0
+        self.n_offered = 0
+        self.n_null = 0
+
+    def __len__(self):
+        return len(self.best)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Remove the spill files"""
+        if self.spill_tempdir is not None:
+            self.spill_tempdir.cleanup()
+            self.spill_tempdir = None
+        self.spill_files = []
+
+    def count_skipped(self, n_skipped: int):
+        """Count null-homologous candidates dropped before offer()"""
+        self.n_offered += n_skipped
+        self.n_null += n_skipped
+
+    def improves(self, key: int, cycle_length: float):
+        """Whether a cycle of this class & length would be kept by offer()"""
+        if key == 0:
+            return False
+        best = self.best.get(key)
+        return best is None or cycle_length < best[0]
+
+    def offer(self, key: int, cycle: tuple):
+        """cycle: (cycle_length, path, annotation), returns whether it was kept"""
+        self.n_offered += 1
+        seq = self.seq
+        self.seq += 1
+
+        if key == 0:
+            self.n_null += 1
+            return False
+
+        best = self.best.get(key)
+        if best is not None and best[0] <= cycle[0]:
+            return False
+
+        self.best[key] = (cycle[0], seq)
+        self.pool[key] = (cycle[0], seq, cycle)
+
+        if self.spill_threshold is not None and len(self.pool) > self.spill_threshold:
+            self.spill()
+        return True
+
+    def spill(self):
+        if self.spill_tempdir is None:
+            self.spill_tempdir = tempfile.TemporaryDirectory(prefix="candidates_", dir=self.spill_dir)
+        path = os.path.join(self.spill_tempdir.name, f"{len(self.spill_files)}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(self.pool, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        logger.debug(f"Spilled {len(self.pool)} candidate cycles to {path}")
+        self.spill_files.append(path)
+        self.pool = {}
+
+    def merge_entries(self, entries: dict):
+        """Merge {key: (cycle_length, seq, cycle)} keeping the shorter cycle per key"""
+        for key, entry in entries.items():
+            best = self.best.get(key)
+            if best is None or entry[:2] < best:
+                self.best[key] = entry[:2]
+                self.pool[key] = entry
+
+    def spilled_entries(self):
+        """{key: (cycle_length, seq, cycle)} of the spilled cycles still kept"""
+        entries = {}
+        for path in self.spill_files:
+            with open(path, "rb") as f:
+                for key, entry in pickle.load(f).items():
+                    # later spills may hold a shorter cycle of the class
+                    if entry[:2] == self.best[key]:
+                        entries[key] = entry
+        return entries
+
+    def get_state(self):
+        """Picklable snapshot of all kept classes (spilled ones included) and counters"""
+        entries = self.spilled_entries()
+        entries.update(self.pool)
+
+        return {
+            'entries': entries,
+            'seq': self.seq,
+            'n_offered': self.n_offered,
+            'n_null': self.n_null
+        }
+
+    def set_state(self, state: dict):
+        """Restore a get_state() snapshot into an empty pool"""
+        assert(len(self.best) == 0 and len(self.spill_files) == 0)
+        self.pool = dict(state['entries'])
+        self.best = {key: entry[:2] for key, entry in self.pool.items()}
+        self.seq = state['seq']
+        self.n_offered = state['n_offered']
+        self.n_null = state['n_null']
+
+    def cycles(self):
+        """All kept cycles, sorted by length (ties in offer order)"""
+        self.pool.update(self.spilled_entries())
+        self.close()
+
+        entries = sorted(self.pool.values(), key=lambda x: x[:2])
+        return [entry[2] for entry in entries]
@@ -0,0 +1,90 @@
+from .candidates import CandidatePool
+from .graphbase import GraphBase
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+class SweepCheckpoint:
+    """Periodic checkpoint of an all-sources sweep, stored in one local file
+
+    Holds the processed ranges of the source order, the candidate pool state and
+    the graph fingerprint. Files are written atomically (temp file + rename) and
+    carry a digest of their payload.
+    """
+    VERSION = 1
+
+    def __init__(self, path: str, interval: float = 60.0):
+        """interval: minimal seconds between two saves in maybe_save()"""
+        self.path = path
+        self.interval = interval
+        # sorted, disjoint [start, end) ranges of positions in the source order
+        self.processed = []
+        self.last_save = time.perf_counter()
+
+    def add_processed(self, start: int, end: int):
+        ranges = sorted(self.processed + [[start, end]])
+        self.processed = [ranges[0]]
+        for range_start, range_end in ranges[1:]:
+            if range_start <= self.processed[-1][1]:
+                self.processed[-1][1] = max(self.processed[-1][1], range_end)
+            else:
+                self.processed.append([range_start, range_end])
+
+    def is_processed(self, idx: int):
+        return any(start <= idx < end for start, end in self.processed)
+
+    def n_processed(self):
+        return sum(end - start for start, end in self.processed)
+
+    def save(self, graphBase: GraphBase, pool: CandidatePool, sweep: dict):
+        """sweep: parameters that must match on resume (e.g. source order)"""
+        payload = pickle.dumps({
+            'version': SweepCheckpoint.VERSION,
+            'fingerprint': graphBase.fingerprint(),
+            'sweep': sweep,
+            'processed': self.processed,
+            'pool': pool.get_state()
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".checkpoint_", dir=os.path.dirname(os.path.abspath(self.path))
+        )
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({'digest': hashlib.sha256(payload).hexdigest(), 'payload': payload}, f)
+        os.replace(tmp_path, self.path)
+
+        self.last_save = time.perf_counter()
+        logger.info(f"Checkpoint written to {self.path}, {self.n_processed()} sources processed")
+
+    def maybe_save(self, graphBase: GraphBase, pool: CandidatePool, sweep: dict):
+        if time.perf_counter() - self.last_save >= self.interval:
+            self.save(graphBase, pool, sweep)
+
+    def load(self, graphBase: GraphBase, pool: CandidatePool, sweep: dict):
+        """Restore processed ranges & pool from the file if there is one,
+        returns whether a checkpoint was loaded"""
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "rb") as f:
+            content = pickle.load(f)
+        if hashlib.sha256(content['payload']).hexdigest() != content['digest']:
+            raise Exception(f"Checkpoint {self.path} is corrupted")
+
+        state = pickle.loads(content['payload'])
+        if state['version'] != SweepCheckpoint.VERSION:
+            raise Exception(f"Unsupported checkpoint version {state['version']}")
+        if state['fingerprint'] != graphBase.fingerprint():
+            raise Exception(f"Checkpoint {self.path} was written for another mesh or annotation")
+        if state['sweep'] != sweep:
+            raise Exception(f"Checkpoint {self.path} was written for another sweep: {state['sweep']}")
+
+        self.processed = state['processed']
+        pool.set_state(state['pool'])
+        logger.info(f"Resumed from {self.path}, {self.n_processed()} sources processed")
+        return True
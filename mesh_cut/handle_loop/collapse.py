@@ -0,0 +1,146 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _unique_simplices(simplices: np.ndarray, n_vertices: int):
+    """simplices: (N, k) sorted vertex ids; returns (unique (U, k), inverse (N,))"""
+    keys = np.zeros(len(simplices), dtype=np.int64)
+    for col in range(0, simplices.shape[1]):
+        keys = keys * n_vertices + simplices[:, col]
+    _, first_idx, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return simplices[first_idx], inverse.reshape(-1)
+
+def _coface_lists(faces_of: np.ndarray, n_faces: int):
+    """faces_of: (N, k) face indices of each simplex -> per face list of simplices"""
+    cofaces = [[] for _ in range(0, n_faces)]
+    for idx, faces in enumerate(faces_of.tolist()):
+        for f in faces:
+            cofaces[f].append(idx)
+    return cofaces
+
+def collapse_tet_complex(tetras: np.ndarray, n_vertices: int, protected_faces: np.ndarray):
+    """Elementary collapses (tet, triangle), (triangle, edge), (edge, vertex)
+    until no free face remains; simplices of protected_faces (the input
+    surface) are never removed.
+
+    Homology is preserved, and the surface is a subcomplex of the result.
+    Returns (vertex_ids, triangles, edges), triangles and edges renumbered
+    into vertex_ids, which keeps the original order (so surface vertices keep their ids).
+    """
+    tetras = np.sort(np.asarray(tetras, dtype=np.int64), axis=1)
+    n_tetras = len(tetras)
+
+    # tet -> 4 triangles -> 3 edges each
+    triangles, tet_tris = _unique_simplices(
+        tetras[:, [[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]]].reshape(-1, 3), n_vertices
+    )
+    tet_tris = tet_tris.reshape(-1, 4)
+    edges, tri_edges = _unique_simplices(
+        triangles[:, [[0, 1], [1, 2], [0, 2]]].reshape(-1, 2), n_vertices
+    )
+    tri_edges = tri_edges.reshape(-1, 3)
+    n_tris = len(triangles)
+    n_edges = len(edges)
+
+    # protect the surface
+    surface = np.sort(np.asarray(protected_faces, dtype=np.int64), axis=1)
+    surface_edges = np.sort(surface[:, [[0, 1], [1, 2], [0, 2]]].reshape(-1, 2), axis=1)
+    tri_keys = (triangles[:, 0] * n_vertices + triangles[:, 1]) * n_vertices + triangles[:, 2]
+    edge_keys = edges[:, 0] * n_vertices + edges[:, 1]
+    tri_protected = np.isin(
+        tri_keys, (surface[:, 0] * n_vertices + surface[:, 1]) * n_vertices + surface[:, 2]
+    ).tolist()
+    edge_protected = np.isin(
+        edge_keys, surface_edges[:, 0] * n_vertices + surface_edges[:, 1]
+    ).tolist()
+    vert_protected = np.zeros(n_vertices, dtype=bool)
+    vert_protected[surface.reshape(-1)] = True
+    vert_protected = vert_protected.tolist()
+
+    tet_alive = [True] * n_tetras
+    tri_alive = [True] * n_tris
+    edge_alive = [True] * n_edges
+    vert_alive = [True] * n_vertices
+
+    # --- (tet, triangle): triangle with exactly one tet ---
+    tri_tets = _coface_lists(tet_tris, n_tris)
+    tri_count = [len(c) for c in tri_tets]
+    tet_tris_list = tet_tris.tolist()
+
+    queue = [t for t in range(0, n_tris) if tri_count[t] == 1 and not tri_protected[t]]
+    while len(queue) > 0:
+        t = queue.pop()
+        if not tri_alive[t] or tri_count[t] != 1:
+            continue
+        (tet, ) = [c for c in tri_tets[t] if tet_alive[c]]
+
+        tet_alive[tet] = False
+        tri_alive[t] = False
+        for t_other in tet_tris_list[tet]:
+            tri_count[t_other] -= 1
+            if tri_count[t_other] == 1 and tri_alive[t_other] and not tri_protected[t_other]:
+                queue.append(t_other)
+
+    # --- (triangle, edge): edge with exactly one triangle, which has no tet ---
+    edge_tris = _coface_lists(tri_edges, n_edges)
+    edge_count = [sum(1 for c in cofaces if tri_alive[c]) for cofaces in edge_tris]
+    tri_edges_list = tri_edges.tolist()
+
+    queue = [e for e in range(0, n_edges) if edge_count[e] == 1 and not edge_protected[e]]
+    while len(queue) > 0:
+        e = queue.pop()
+        if not edge_alive[e] or edge_count[e] != 1:
+            continue
+        (t, ) = [c for c in edge_tris[e] if tri_alive[c]]
+        if tri_count[t] != 0 or tri_protected[t]:
+            continue
+
+        tri_alive[t] = False
+        edge_alive[e] = False
+        for e_other in tri_edges_list[t]:
+            edge_count[e_other] -= 1
+            if edge_count[e_other] == 1 and edge_alive[e_other] and not edge_protected[e_other]:
+                queue.append(e_other)
+
+    # --- (edge, vertex): vertex with exactly one edge, which has no triangle ---
+    edges_list = edges.tolist()
+    vert_edges = [[] for _ in range(0, n_vertices)]
+    for e, (vs, vd) in enumerate(edges_list):
+        vert_edges[vs].append(e)
+        vert_edges[vd].append(e)
+    vert_count = [sum(1 for c in cofaces if edge_alive[c]) for cofaces in vert_edges]
+
+    queue = [v for v in range(0, n_vertices) if vert_count[v] == 1 and not vert_protected[v]]
+    while len(queue) > 0:
+        v = queue.pop()
+        if not vert_alive[v] or vert_count[v] != 1:
+            continue
+        (e, ) = [c for c in vert_edges[v] if edge_alive[c]]
+        if edge_count[e] != 0 or edge_protected[e]:
+            continue
+
+        edge_alive[e] = False
+        vert_alive[v] = False
+        for v_other in edges_list[e]:
+            vert_count[v_other] -= 1
+            if vert_count[v_other] == 1 and vert_alive[v_other] and not vert_protected[v_other]:
+                queue.append(v_other)
+
+    # isolated vertices were never part of the complex
+    vert_alive = np.array(vert_alive) & (np.array(vert_count) > 0)
+    vertex_ids = np.flatnonzero(vert_alive)
+    new_id = np.full(n_vertices, -1, dtype=np.int64)
+    new_id[vertex_ids] = np.arange(len(vertex_ids))
+
+    remaining_tris = new_id[triangles[np.array(tri_alive, dtype=bool)]]
+    remaining_edges = new_id[edges[np.array(edge_alive, dtype=bool)]]
+    assert((remaining_tris >= 0).all() and (remaining_edges >= 0).all())
+
+    logger.info(
+        f"Collapsed complex: V {n_vertices} -> {len(vertex_ids)}, "
+        f"E {n_edges} -> {len(remaining_edges)}, F {n_tris} -> {len(remaining_tris)}, "
+        f"{sum(tet_alive)} of {n_tetras} tetrahedra left"
+    )
+
+    return vertex_ids, remaining_tris, remaining_edges
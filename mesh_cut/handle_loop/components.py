@@ -0,0 +1,134 @@
+"""
+Per connected component handle loops
+
+Scans often hold several disjoint shells, while GraphBase assumes one closed
+component. Components are labelled with a vectorized union-find over the faces,
+genus-0 & open shells are skipped from their Euler characteristic, the others
+get their own GraphBase, annotation and optimal basis (in parallel).
+"""
+
+from .homology_opt import HomologyBasisOptimizer
+from .annotator import Annotator, TreeCotreeAnnotator
+from .graphbase import GraphBase, union_labels
+import multiprocessing
+import openmesh as om
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def connected_components(fv_indices: np.ndarray, n_vertices: int):
+    """Returns (n_components, labels), labels: (n_vertices,) component id per vertex,
+    numbered by first vertex. Isolated vertices form their own components"""
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    labels = union_labels(fv_indices[:, [0, 1, 2]].reshape(-1), fv_indices[:, [1, 2, 0]].reshape(-1), n_vertices)
+
+    roots, labels = np.unique(labels, return_inverse=True)
+    return len(roots), labels.reshape(-1)
+
+def component_stats(fv_indices: np.ndarray, labels: np.ndarray, n_components: int):
+    """Returns (genus, closed) per component; genus from V - E + F,
+    closed if every edge has exactly two faces"""
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    face_edges = np.sort(fv_indices[:, [[0, 1], [1, 2], [0, 2]]].reshape(-1, 2), axis=1)
+    edges, edge_faces = np.unique(face_edges, axis=0, return_counts=True)
+
+    n_v = np.bincount(labels, minlength=n_components)
+    n_e = np.bincount(labels[edges[:, 0]], minlength=n_components)
+    n_f = np.bincount(labels[fv_indices[:, 0]], minlength=n_components)
+    open_edges = np.bincount(labels[edges[:, 0]], weights=edge_faces != 2, minlength=n_components)
+
+    genus = (2 - (n_v - n_e + n_f)) / 2
+    return genus, open_edges == 0
+
+def split_components(points: np.ndarray, fv_indices: np.ndarray, labels: np.ndarray, n_components: int):
+    """Returns [(vertex_ids, points, fv_indices)] per component, fv_indices local"""
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    vertex_order = np.argsort(labels, kind='stable')
+    vertex_offsets = np.searchsorted(labels[vertex_order], np.arange(n_components + 1))
+    face_labels = labels[fv_indices[:, 0]]
+    face_order = np.argsort(face_labels, kind='stable')
+    face_offsets = np.searchsorted(face_labels[face_order], np.arange(n_components + 1))
+
+    local_ids = np.empty(len(labels), dtype=np.int64)
+    local_ids[vertex_order] = np.arange(len(labels)) - vertex_offsets[labels[vertex_order]]
+
+    components = []
+    for c in range(0, n_components):
+        vertex_ids = vertex_order[vertex_offsets[c]:vertex_offsets[c + 1]]
+        faces = local_ids[fv_indices[face_order[face_offsets[c]:face_offsets[c + 1]]]]
+        components.append((vertex_ids, np.asarray(points)[vertex_ids], faces))
+    return components
+
+def annotated_component_graph(points: np.ndarray, fv_indices: np.ndarray, annotation: str, reorder: str = None):
+    """GraphBase of one closed component with its annotation set"""
+    graphBase = GraphBase(points, fv_indices, reorder=reorder)
+    if annotation == 'volumetric':
+        mesh = om.TriMesh(graphBase._points, graphBase._fv_indices)
+        annotator = Annotator(GraphBase.volumetric_from_openmesh(mesh, collapse=True))
+        graphBase.set_annotation(*annotator.compute_annotation(edges=graphBase.edge_set))
+    else:
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+    return graphBase
+
+def component_cycles(component_id: int, vertex_ids: np.ndarray, graphBase: GraphBase, optimizer_options: dict):
+    """[(component_id, cycle_length, path, annotation)], path in original vertex ids"""
+    cycles = HomologyBasisOptimizer(graphBase, **optimizer_options).compute_optimal_basis()
+    return [
+        (component_id, cycle_length, vertex_ids[graphBase.original_vertex_ids(path)].tolist(), cycle_annotation)
+        for cycle_length, path, cycle_annotation in cycles
+    ]
+
+def component_basis(args):
+    """(component_id, vertex_ids, points, fv_indices, annotation, reorder, optimizer_options)
+    -> component_cycles"""
+    component_id, vertex_ids, points, fv_indices, annotation, reorder, optimizer_options = args
+
+    graphBase = annotated_component_graph(points, fv_indices, annotation, reorder)
+    return component_cycles(component_id, vertex_ids, graphBase, optimizer_options)
+
+def closed_components(points: np.ndarray, fv_indices: np.ndarray):
+    """[(component_id, vertex_ids, points, fv_indices)] of the closed components of positive genus"""
+    n_components, labels = connected_components(fv_indices, len(points))
+    genus, closed = component_stats(fv_indices, labels, n_components)
+    logger.info(f"{n_components} components, genus {genus.astype(int).tolist() if closed.all() else genus.tolist()}")
+
+    for c in np.flatnonzero(~closed):
+        logger.warning(f"Skipping component {c}, it is not closed")
+    selected = np.flatnonzero(closed & (genus > 0.5))
+
+    components = split_components(points, fv_indices, labels, n_components)
+    return [(int(c), *components[c]) for c in selected]
+
+def compute_component_bases(points: np.ndarray, fv_indices: np.ndarray, annotation: str = 'tree_cotree',
+                            n_workers: int = None, reorder: str = None, optimizer_options: dict = None):
+    """Optimal basis of each closed component of positive genus
+
+    annotation: 'tree_cotree' (all 2g loops) or 'volumetric' (g handle loops)
+    n_workers: processes across components, defaults to cpu count
+    reorder: vertex reordering of each component GraphBase, see GraphBase
+    Returns [(component_id, cycle_length, path, annotation)] sorted by component & length,
+    paths in the original vertex ids
+    """
+    if annotation not in ('tree_cotree', 'volumetric'):
+        raise Exception(f"Unknown annotation {annotation}")
+    optimizer_options = {} if optimizer_options is None else optimizer_options
+
+    jobs = [
+        (component_id, vertex_ids, component_points, component_faces, annotation, reorder, optimizer_options)
+        for component_id, vertex_ids, component_points, component_faces in closed_components(points, fv_indices)
+    ]
+    # largest components first for a better balance
+    jobs.sort(key=lambda job: len(job[3]), reverse=True)
+
+    n_workers = min(len(jobs), n_workers if n_workers is not None else os.cpu_count())
+    if n_workers > 1:
+        with multiprocessing.Pool(n_workers) as pool:
+            results = pool.map(component_basis, jobs, chunksize=1)
+    else:
+        results = [component_basis(job) for job in jobs]
+
+    cycles = [cycle for result in results for cycle in result]
+    cycles.sort(key=lambda cycle: (cycle[0], cycle[1]))
+    return cycles
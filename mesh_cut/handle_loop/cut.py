@@ -0,0 +1,163 @@
+"""
+Cutting a mesh into a topological disk
+
+Half-edge h = 3 * f + k runs from fv_indices[f, k] to fv_indices[f, (k + 1) % 3],
+corner h is the corner of fv_indices[f, k] in face f. Around each vertex, corners
+of faces adjacent across an uncut edge are joined; every group of corners
+(a wedge between two cut edges) becomes one vertex of the cut mesh.
+
+A cut graph is either given (e.g. the peeled CutMesh edges of mesh_cut/main.py)
+or built from loops: a dual spanning tree crossing loop edges only when needed,
+the uncrossed edges with dangling branches pruned.
+"""
+
+from .graphbase import union_labels
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+def half_edge_twins(fv_indices: np.ndarray):
+    """Returns (twin, keys), twin: (3F,) opposite half-edge or -1 on the boundary,
+    keys: (3F,) undirected edge key min * n + max"""
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    vs = fv_indices.reshape(-1)
+    vd = fv_indices[:, [1, 2, 0]].reshape(-1)
+    n = int(fv_indices.max()) + 1
+    keys = np.minimum(vs, vd) * n + np.maximum(vs, vd)
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]]))
+    counts = np.diff(np.concatenate([starts, [len(keys)]]))
+    if (counts > 2).any():
+        raise Exception("Mesh is not a manifold.")
+
+    twin = np.full(len(keys), -1, dtype=np.int64)
+    pairs = starts[counts == 2]
+    twin[order[pairs]] = order[pairs + 1]
+    twin[order[pairs + 1]] = order[pairs]
+    return twin, keys
+
+def edge_keys(edges, n: int):
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    return np.minimum(edges[:, 0], edges[:, 1]) * n + np.maximum(edges[:, 0], edges[:, 1])
+
+def cut_graph(fv_indices: np.ndarray, loops: list = None):
+    """Cut graph containing the loop edges whose removal leaves a disk, (m, 2) vertex pairs
+
+    loops: vertex paths, e.g. the paths of compute_optimal_basis. Loop edges are
+    kept unless the loops alone split the surface, then some are crossed
+    """
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    n = int(fv_indices.max()) + 1
+    n_faces = len(fv_indices)
+    twin, keys = half_edge_twins(fv_indices)
+
+    on_loop = np.zeros(len(keys), dtype=bool)
+    if loops is not None and len(loops) > 0:
+        loop_keys = np.concatenate([edge_keys(list(zip(path[:-1], path[1:])), n) for path in loops])
+        on_loop = np.isin(keys, loop_keys)
+        if len(np.setdiff1d(loop_keys, keys[on_loop])) > 0:
+            raise Exception("Loop edges are not mesh edges.")
+
+    # level synchronous BFS over the dual graph, crossing loop edges when stuck
+    crossable = twin >= 0
+    free = crossable & ~on_loop
+    in_tree = np.zeros(len(keys), dtype=bool)
+    visited = np.zeros(n_faces, dtype=bool)
+    visited[0] = True
+    frontier = np.array([0], dtype=np.int64)
+    n_crossed = 0
+    while True:
+        while len(frontier) > 0:
+            half_edges = (3 * frontier[:, None] + np.arange(3)).reshape(-1)
+            half_edges = half_edges[free[half_edges]]
+            half_edges = half_edges[~visited[twin[half_edges] // 3]]
+            frontier, first = np.unique(twin[half_edges] // 3, return_index=True)
+            half_edges = half_edges[first]
+            visited[frontier] = True
+            in_tree[half_edges] = True
+            in_tree[twin[half_edges]] = True
+        if visited.all():
+            break
+
+        half_edges = np.flatnonzero(on_loop & crossable & visited[np.arange(len(keys)) // 3])
+        half_edges = half_edges[~visited[twin[half_edges] // 3]]
+        if len(half_edges) == 0:
+            raise Exception("Mesh not connected.")
+        frontier, first = np.unique(twin[half_edges] // 3, return_index=True)
+        half_edges = half_edges[first]
+        visited[frontier] = True
+        in_tree[half_edges] = True
+        in_tree[twin[half_edges]] = True
+        n_crossed += len(half_edges)
+    if n_crossed > 0:
+        logger.warning(f"Loops split the surface, {n_crossed} loop edges are not cut")
+
+    vs = fv_indices.reshape(-1)
+    vd = fv_indices[:, [1, 2, 0]].reshape(-1)
+    cut = np.flatnonzero(crossable & ~in_tree & (np.arange(len(keys)) < twin))
+    edges = np.stack([vs[cut], vd[cut]], axis=1)
+    return prune_dangling(edges, np.unique(vs[~crossable]), n)
+
+def prune_dangling(edges: np.ndarray, pinned: np.ndarray, n: int):
+    """Removes dangling branches of the edge graph, pinned (boundary) vertices
+    are never leaves. Each edge is looked at once per endpoint"""
+    if len(edges) == 0:
+        return edges
+    endpoints = edges.reshape(-1)
+    incident_order = np.argsort(endpoints, kind='stable')
+    incident_edges = incident_order // 2
+    offsets = np.searchsorted(endpoints[incident_order], np.arange(n + 1))
+
+    alive = np.ones(len(edges), dtype=bool)
+    degree = np.bincount(endpoints, minlength=n)
+    degree[pinned] += len(edges)
+
+    leaves = np.flatnonzero(degree == 1)
+    while len(leaves) > 0:
+        # incident edges of all leaves
+        counts = offsets[leaves + 1] - offsets[leaves]
+        starts = np.repeat(offsets[leaves] - np.cumsum(counts) + counts, counts)
+        candidates = incident_edges[starts + np.arange(counts.sum())]
+        removed = np.unique(candidates[alive[candidates]])
+        alive[removed] = False
+
+        touched = edges[removed].reshape(-1)
+        np.subtract.at(degree, touched, 1)
+        leaves = np.unique(touched[degree[touched] == 1])
+    return edges[alive]
+
+def cut_mesh(points: np.ndarray, fv_indices: np.ndarray, cut_edges):
+    """Duplicates vertices along the cut edges
+
+    cut_edges: (m, 2) vertex pairs, mesh edges
+    Returns (points, fv_indices, vertex_map) of the cut mesh, vertex_map: (n_cut_vertices,)
+    original vertex of each cut mesh vertex. Vertices without faces are dropped
+    """
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    n = int(fv_indices.max()) + 1
+    twin, keys = half_edge_twins(fv_indices)
+
+    cut_keys = edge_keys(cut_edges, n)
+    is_cut = np.isin(keys, cut_keys)
+    if len(np.setdiff1d(cut_keys, keys[is_cut])) > 0:
+        raise Exception("Cut edges are not mesh edges.")
+
+    # corner h of the start vertex of h meets corner next(twin(h)) of the same vertex
+    joined = np.flatnonzero((twin >= 0) & ~is_cut)
+    twins = twin[joined]
+    next_of_twins = twins - twins % 3 + (twins + 1) % 3
+    labels = union_labels(joined, next_of_twins, len(keys))
+
+    roots, labels = np.unique(labels, return_inverse=True)
+    labels = labels.reshape(-1)
+    vertex_map = np.empty(len(roots), dtype=np.int64)
+    vertex_map[labels] = fv_indices.reshape(-1)
+
+    return np.asarray(points)[vertex_map], labels.reshape(-1, 3), vertex_map
+
+def cut_to_disk(points: np.ndarray, fv_indices: np.ndarray, loops: list = None):
+    """cut_mesh along cut_graph(fv_indices, loops), returns (points, fv_indices, vertex_map)"""
+    return cut_mesh(points, fv_indices, cut_graph(fv_indices, loops))
@@ -1,6 +1,12 @@
-from .linalg import check_z2
+from .linalg import check_z2, pack_z2_rows, unpack_z2_rows
+from .collapse import collapse_tet_complex
 import numpy as np
 import logging
+import hashlib
+import json
+import os
+import tempfile
+import time
 import openmesh as om
 import meshpy, meshpy.tet, meshpy.geometry
 
@@ -38,6 +44,127 @@ class GraphPool:
         assert(id in self.pool)
         return self.pool[id]
 
+def union_labels(vs: np.ndarray, vd: np.ndarray, n: int):
+    """Component label per element of range(n) joined by the pairs (vs[i], vd[i]),
+    the smallest element of each component"""
+    # hook roots onto the smaller root of their neighbors, then pointer jumping
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        root_s, root_d = labels[vs], labels[vd]
+        hooking = root_s != root_d
+        if not hooking.any():
+            break
+        np.minimum.at(labels, np.maximum(root_s, root_d)[hooking], np.minimum(root_s, root_d)[hooking])
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all():
+                break
+            labels = jumped
+    return labels
+
+def winding_numbers(points: np.ndarray, fv_indices: np.ndarray, queries: np.ndarray):
+    """Generalized winding number of the triangles at each query point, +-1 inside
+    a closed surface, 0 outside"""
+    tri = points[fv_indices]
+    numbers = np.empty(len(queries))
+    for i, q in enumerate(queries):
+        a, b, c = tri[:, 0] - q, tri[:, 1] - q, tri[:, 2] - q
+        la, lb, lc = (np.linalg.norm(v, axis=1) for v in (a, b, c))
+        det = np.einsum('ij,ij->i', a, np.cross(b, c))
+        dot = la * lb * lc + np.einsum('ij,ij->i', a, b) * lc + \
+            np.einsum('ij,ij->i', b, c) * la + np.einsum('ij,ij->i', c, a) * lb
+        # signed solid angle of each triangle
+        numbers[i] = 2 * np.arctan2(det, dot).sum() / (4 * np.pi)
+    return numbers
+
+def interior_points(points: np.ndarray, fv_indices: np.ndarray, n_candidates: int = 16):
+    """One point strictly inside each connected component, e.g. as tetgen holes
+
+    Centroids of the largest faces are pushed off the face to both sides by a fraction
+    of its size; the first one with winding number of its component near +-1 is taken
+    """
+    points = np.asarray(points, dtype=np.float64)
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    labels = union_labels(fv_indices[:, [0, 1, 2]].reshape(-1), fv_indices[:, [1, 2, 0]].reshape(-1), len(points))
+    face_labels = labels[fv_indices[:, 0]]
+
+    tri = points[fv_indices]
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    areas = np.linalg.norm(normals, axis=1)
+
+    holes = []
+    for label in np.unique(face_labels):
+        faces = np.flatnonzero(face_labels == label)
+        candidates = faces[np.argsort(-areas[faces], kind='stable')[:n_candidates]]
+        offsets = 1e-2 * normals[candidates] / np.sqrt(areas[candidates])[:, None]
+        centroids = tri[candidates].mean(axis=1)
+        queries = np.concatenate([centroids - offsets, centroids + offsets])
+
+        inside = np.flatnonzero(np.abs(winding_numbers(points, fv_indices[faces], queries)) > 0.5)
+        if len(inside) == 0:
+            raise Exception(f"No interior point found for the component of vertex {label}.")
+        holes.append(tuple(queries[inside[0]].tolist()))
+    return holes
+
+# --- Exterior shells & sizing for volumetric_from_openmesh ---
+def box_shell(points: np.ndarray, margin: float):
+    """AABB of points grown by margin, returns (shell_points, shell_facets)"""
+    boxPoints, boxFacets, _, _ = meshpy.geometry.make_box(
+        points.min(axis=0) - margin, points.max(axis=0) + margin
+    )
+    return np.asarray(boxPoints), boxFacets
+
+def hull_shell(points: np.ndarray, scale: float):
+    """Convex hull of points scaled by scale around their centroid,
+    returns (shell_points, shell_facets)"""
+    assert(scale > 1.0)
+
+    # hull faces are the faces of exactly one Delaunay tetrahedron
+    meshInfo = meshpy.tet.MeshInfo()
+    meshInfo.set_points(points)
+    delaunay = meshpy.tet.build(meshInfo, options=meshpy.tet.Options("Q"))
+    tetras = np.sort(np.asarray(delaunay.elements, dtype=np.int64), axis=1)
+    faces = tetras[:, [[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]]].reshape(-1, 3)
+    faces, counts = np.unique(faces, axis=0, return_counts=True)
+    hull_faces = faces[counts == 1]
+
+    hull_vertices, hull_faces = np.unique(hull_faces, return_inverse=True)
+    centroid = points.mean(axis=0)
+    shell_points = centroid + (points[hull_vertices] - centroid) * scale
+
+    return shell_points, hull_faces.reshape(-1, 3).tolist()
+
+def graded_sizing(points: np.ndarray, fv_indices: np.ndarray, shell_points: np.ndarray, grading: float,
+                  chunk_size: int = 1 << 22):
+    """Target edge length for points followed by shell_points:
+    mean incident edge length on the surface, growing by grading * distance outside
+    chunk_size: at most this many shell & surface point pairs at once"""
+    edges = np.sort(np.asarray(fv_indices)[:, [[0, 1], [1, 2], [0, 2]]].reshape(-1, 2), axis=1)
+    edges = np.unique(edges, axis=0)
+    lengths = np.sqrt(np.sum((points[edges[:, 1]] - points[edges[:, 0]]) ** 2, axis=1))
+
+    surface_sizing = np.zeros(len(points))
+    np.add.at(surface_sizing, edges.reshape(-1), np.repeat(lengths, 2))
+    surface_sizing /= np.maximum(np.bincount(edges.reshape(-1), minlength=len(points)), 1)
+
+    # brute force nearest surface point, in chunks of shell points
+    shell_sizing = np.empty(len(shell_points))
+    rows = max(1, chunk_size // len(points))
+    for start in range(0, len(shell_points), rows):
+        chunk = shell_points[start:start + rows]
+        dists = np.sqrt(np.sum((chunk[:, None, :] - points[None, :, :]) ** 2, axis=2))
+        nearest = np.argmin(dists, axis=1)
+        shell_sizing[start:start + rows] = surface_sizing[nearest] + grading * dists[np.arange(len(chunk)), nearest]
+
+    return np.concatenate((surface_sizing, shell_sizing))
+
+def write_mtr(basename: str, sizing: np.ndarray):
+    """tetgen .mtr file with one sizing value per point"""
+    with open(f"{basename}.mtr", "w") as f:
+        f.write(f"{len(sizing)} 1\n")
+        for value in sizing:
+            f.write(f"{value:.17g}\n")
+
 class GraphBase:
     # --- Traversal mechanics ---
     def all_edges_iterator(self):
@@ -89,7 +216,32 @@ class GraphBase:
         assert(self.annotation is None and self.annotation_null_vector is None)
         self.annotation = annotation
         self.annotation_null_vector = null_vector
+
+        # (n_edges, ceil(dim / 64)) packed annotation per edge index
+        edge_annotation = np.zeros((self.n_edges, null_vector.shape[0]), dtype=np.int8)
+        if len(annotation) > 0:
+            # annotation may cover a larger complex, e.g. the volumetric one
+            keys = np.array(list(annotation.keys()), dtype=np.int64)
+            edge_ids = self.edge_index(keys[:, 0], keys[:, 1], strict=False)
+            found = edge_ids >= 0
+            edge_annotation[edge_ids[found]] = np.stack(list(annotation.values()))[found]
+        self.edge_annotation_words = pack_z2_rows(edge_annotation)
     
+    def fingerprint(self):
+        """{'mesh': digest of points & edges, 'annotation': digest of edge annotations}"""
+        mesh_hash = hashlib.sha256()
+        for array in (self._points, self.edges):
+            array = np.ascontiguousarray(array)
+            mesh_hash.update(str((array.dtype.str, array.shape)).encode())
+            mesh_hash.update(array.tobytes())
+
+        annotation_hash = hashlib.sha256()
+        if self.edge_annotation_words is not None:
+            annotation_hash.update(str(self.annotation_null_vector.shape[0]).encode())
+            annotation_hash.update(np.ascontiguousarray(self.edge_annotation_words, dtype='<u8').tobytes())
+
+        return {'mesh': mesh_hash.hexdigest(), 'annotation': annotation_hash.hexdigest()}
+
     def get_edge_annotation(self, vs, vd):
         assert(self.annotation is not None and self.annotation_null_vector is not None)
 
@@ -99,73 +251,68 @@ class GraphBase:
         else:
             return self.annotation_null_vector
 
-    def __init__(self, points: np.ndarray, fv_indices: np.ndarray, volumetric: bool = False):
+    def __init__(self, points: np.ndarray, fv_indices: np.ndarray, volumetric: bool = False,
+                 edges: np.ndarray = None, edge_lengths: np.ndarray = None, fe_indices: np.ndarray = None,
+                 reorder: str = None, check_genus: bool = True):
+        """
+        points: (V, 3), fv_indices: (F, 3)
+        edges, edge_lengths, fe_indices are derived from fv_indices when not given;
+        given arrays (e.g. memory-mapped ones from a cache) are used without copying
+        reorder: None, 'rcm' or 'morton', renumber vertices (then faces & edges) for locality;
+            vertex_order & face_order map the new ids back to the given ones
+        check_genus: check that a surface is closed with integer genus, off for sub-surfaces
+        """
 
         # -- Annotations --
         self.annotation = None
         self.annotation_null_vector = None
+        self.edge_annotation_words = None
         # -----------------
 
-        self._v_pool = GraphPool()
+        # new id -> given id, None if not reordered
+        self.vertex_order = None
+        self.face_order = None
+        if reorder is not None:
+            assert(edges is None)
+            points, fv_indices = self.apply_reorder(points, fv_indices, reorder)
+
         self._fv_indices = fv_indices
         self._points = points
+        self.volumetric = volumetric
+        # filled in by volumetric_from_openmesh
+        self.tetgen_stats = None
+
+        if edges is None:
+            edges, fe_indices = GraphBase.extract_edges(fv_indices)
+
+        # (E, 2) with edges[i, 0] < edges[i, 1], indexed by edge index
+        self.edges = edges
+        # (E,) euclidean length of each edge
+        if edge_lengths is None:
+            edge_lengths = np.sqrt(np.sum((points[edges[:, 1]] - points[edges[:, 0]]) ** 2, axis=1))
+        self.edge_lengths = edge_lengths
+        # (F, 3) face -> edge incidence: (f0, f1), (f1, f2), (f0, f2)
+        if fe_indices is None:
+            fe_indices = GraphBase.lookup_face_edges(fv_indices, edges, len(points))
+        self.fe_indices = fe_indices
+
+        # dict based views, built on first use
+        self._v_pool_cache = None
+        self._edge_lookup = None
+        self._rev_edge_lookup = None
+        self._edge_set = None
+        self._edge_keys_sorted = None
+        self._edge_key_order = None
+        self._csr_adjacency = None
 
-        # provide (vs, vd) -> edge index; vs < vd
-        self.edge_lookup = {}
-        # edge_index -> (vs, vd)
-        self.rev_edge_lookup = {}
-        self.edge_set = set()
-
-        for idx, coord in enumerate(self._points):
-            self._v_pool.add(
-                idx,
-                GraphVertex(idx, coord)
-            )
-
-        edge_idx = 0
-        for face in self._fv_indices:
-            v0 = self._v_pool.get(face[0])
-            v1 = self._v_pool.get(face[1])
-            v2 = self._v_pool.get(face[2])
-
-            v0.add_edge_if_absent(v1)
-            v0.add_edge_if_absent(v2)
-            v1.add_edge_if_absent(v2)
-
-            # must be sorted!
-            e0 = tuple(sorted((face[0], face[1])))
-            e1 = tuple(sorted((face[1], face[2])))
-            e2 = tuple(sorted((face[0], face[2])))
-
-            self.edge_set.add(e0)
-            self.edge_set.add(e1)
-            self.edge_set.add(e2)
-
-            if e0 not in self.edge_lookup:
-                self.edge_lookup[e0] = edge_idx
-                self.rev_edge_lookup[edge_idx] = e0
-                edge_idx += 1
-
-            if e1 not in self.edge_lookup:
-                self.edge_lookup[e1] = edge_idx
-                self.rev_edge_lookup[edge_idx] = e1
-                edge_idx += 1
-
-            if e2 not in self.edge_lookup:
-                self.edge_lookup[e2] = edge_idx
-                self.rev_edge_lookup[edge_idx] = e2
-                edge_idx += 1
-        
         self.n_vertices = len(self._points)
         self.n_faces = len(self._fv_indices)
-        self.n_edges = len(self.edge_set)
+        self.n_edges = len(self.edges)
 
-        assert(edge_idx == self.n_edges)
-        
         # TODO: check if mesh is closed
         self.genus = 1 - (self.n_vertices - self.n_edges + self.n_faces) / 2
 
-        if not volumetric:
+        if not volumetric and check_genus:
             if abs(self.genus - 0.5) < 1e-3:
                 raise Exception("The mesh seems already planar!")
             assert(abs(round(self.genus) - self.genus) < 1e-3)
@@ -173,17 +320,302 @@ class GraphBase:
         self.genus = round(self.genus)
 
         logger.info(f"V={self.n_vertices}, E={self.n_edges}, F={self.n_faces}, genus={self.genus}")
-    
+
+    def apply_reorder(self, points: np.ndarray, fv_indices: np.ndarray, reorder: str):
+        """Returns renumbered (points, fv_indices), fills vertex_order & face_order"""
+        fv_indices = np.asarray(fv_indices, dtype=np.int64)
+        if reorder == 'rcm':
+            vertex_order = GraphBase.rcm_order(fv_indices, len(points))
+        elif reorder == 'morton':
+            vertex_order = GraphBase.morton_order(points)
+        else:
+            raise Exception(f"Unknown reorder {reorder}")
+
+        rank = np.empty_like(vertex_order)
+        rank[vertex_order] = np.arange(len(vertex_order))
+        fv_indices = rank[fv_indices]
+        # faces by their smallest vertex, edges follow (numbered by first appearance)
+        sorted_faces = np.sort(fv_indices, axis=1)
+        face_order = np.lexsort((sorted_faces[:, 2], sorted_faces[:, 1], sorted_faces[:, 0]))
+
+        self.vertex_order = vertex_order
+        self.face_order = face_order
+        return np.asarray(points)[vertex_order], fv_indices[face_order]
+
+    @staticmethod
+    def rcm_order(fv_indices: np.ndarray, n_vertices: int):
+        """Reverse Cuthill-McKee vertex order (new id -> old id) of the face graph"""
+        edges, _ = GraphBase.extract_edges(fv_indices)
+        ends = np.concatenate((edges[:, 0], edges[:, 1]))
+        neighs = np.concatenate((edges[:, 1], edges[:, 0]))
+        degrees = np.bincount(ends, minlength=n_vertices)
+
+        # neighbors of each vertex by increasing degree
+        order = np.lexsort((neighs, degrees[neighs], ends))
+        neighs = neighs[order].tolist()
+        offsets = np.zeros(n_vertices + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        offsets = offsets.tolist()
+
+        visited = [False] * n_vertices
+        queue = []
+        # each component starts from a vertex of minimal degree
+        for start in np.lexsort((np.arange(n_vertices), degrees)).tolist():
+            if visited[start]:
+                continue
+            visited[start] = True
+            head = len(queue)
+            queue.append(start)
+            while head < len(queue):
+                vs = queue[head]
+                head += 1
+                for vd in neighs[offsets[vs]:offsets[vs + 1]]:
+                    if not visited[vd]:
+                        visited[vd] = True
+                        queue.append(vd)
+
+        return np.array(queue[::-1], dtype=np.int64)
+
+    @staticmethod
+    def morton_order(points: np.ndarray, bits: int = 21):
+        """Z-order curve vertex order (new id -> old id) of points"""
+        points = np.asarray(points, dtype=np.float64)
+        extent = np.maximum(points.max(axis=0) - points.min(axis=0), 1e-300)
+        cells = ((points - points.min(axis=0)) / extent * ((1 << bits) - 1)).astype(np.uint64)
+
+        # spread the low 21 bits so that two zero bits follow each of them
+        cells &= np.uint64(0x1fffff)
+        for shift, mask in ((32, 0x1f00000000ffff), (16, 0x1f0000ff0000ff), (8, 0x100f00f00f00f00f),
+                            (4, 0x10c30c30c30c30c3), (2, 0x1249249249249249)):
+            cells = (cells | (cells << np.uint64(shift))) & np.uint64(mask)
+
+        codes = cells[:, 0] | (cells[:, 1] << np.uint64(1)) | (cells[:, 2] << np.uint64(2))
+        return np.argsort(codes, kind='stable')
+
+    def original_vertex_ids(self, vertex_ids):
+        """Map vertex ids (e.g. a path) back to the ids given at construction"""
+        if self.vertex_order is None:
+            return np.asarray(vertex_ids, dtype=np.int64)
+        return self.vertex_order[np.asarray(vertex_ids, dtype=np.int64)]
+
+    @staticmethod
+    def extract_edges(fv_indices: np.ndarray):
+        """Returns (edges, fe_indices), edges numbered by first appearance in fv_indices"""
+        fv_indices = np.asarray(fv_indices)
+        face_edges = np.sort(
+            fv_indices[:, [[0, 1], [1, 2], [0, 2]]].reshape(-1, 2), axis=1
+        ).astype(np.int64)
+
+        keys = face_edges[:, 0] * (int(face_edges.max(initial=0)) + 1) + face_edges[:, 1]
+        _, first_idx, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        # np.unique sorts by key; renumber by first appearance instead
+        order = np.argsort(first_idx, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+
+        edges = face_edges[first_idx[order]]
+        fe_indices = rank[inverse.reshape(-1)].reshape(-1, 3)
+        return edges, fe_indices
+
     @staticmethod
-    def from_openmesh(mesh: om.TriMesh, copy: bool = False):
+    def lookup_face_edges(fv_indices: np.ndarray, edges: np.ndarray, n_vertices: int):
+        """Returns fe_indices for given edges, which must contain all face edges"""
+        fv_indices = np.asarray(fv_indices)
+        face_edges = np.sort(
+            fv_indices[:, [[0, 1], [1, 2], [0, 2]]].reshape(-1, 2), axis=1
+        ).astype(np.int64)
+
+        edge_keys = edges[:, 0].astype(np.int64) * n_vertices + edges[:, 1]
+        order = np.argsort(edge_keys)
+        face_keys = face_edges[:, 0] * n_vertices + face_edges[:, 1]
+        pos = np.searchsorted(edge_keys, face_keys, sorter=order)
+        pos = np.minimum(pos, len(order) - 1)
+        assert((edge_keys[order[pos]] == face_keys).all())
+
+        return order[pos].reshape(-1, 3)
+
+    # --- Dict based views over the edge arrays ---
+    @property
+    def _v_pool(self) -> GraphPool:
+        if self._v_pool_cache is None:
+            v_pool = GraphPool()
+            for idx, coord in enumerate(self._points):
+                v_pool.add(idx, GraphVertex(idx, coord))
+
+            # same neighbor order as adding (f0, f1), (f0, f2), (f1, f2) face by face
+            edge_order = np.asarray(self.fe_indices)[:, [0, 2, 1]].reshape(-1)
+            _, first_idx = np.unique(edge_order, return_index=True)
+            edge_order = np.concatenate((
+                edge_order[np.sort(first_idx)],
+                np.setdiff1d(np.arange(self.n_edges), edge_order)
+            ))
+
+            for e_idx, (vs, vd), dist in zip(
+                    edge_order.tolist(),
+                    np.asarray(self.edges)[edge_order].tolist(),
+                    np.asarray(self.edge_lengths)[edge_order].tolist()):
+                v0 = v_pool.get(vs)
+                v1 = v_pool.get(vd)
+                v0.edges[vd] = (v1, dist)
+                v1.edges[vs] = (v0, dist)
+
+            self._v_pool_cache = v_pool
+        return self._v_pool_cache
+
+    @property
+    def edge_lookup(self):
+        """(vs, vd) -> edge index; vs < vd"""
+        if self._edge_lookup is None:
+            self._edge_lookup = {
+                tuple(e): idx for idx, e in enumerate(np.asarray(self.edges).tolist())
+            }
+        return self._edge_lookup
+
+    @property
+    def rev_edge_lookup(self):
+        """edge index -> (vs, vd)"""
+        if self._rev_edge_lookup is None:
+            self._rev_edge_lookup = {
+                idx: tuple(e) for idx, e in enumerate(np.asarray(self.edges).tolist())
+            }
+        return self._rev_edge_lookup
+
+    def edge_index(self, vs: np.ndarray, vd: np.ndarray, strict: bool = True):
+        """Vectorized edge_lookup, (vs[i], vd[i]) in any order
+        strict: assert all edges exist, otherwise missing edges get -1"""
+        if self._edge_key_order is None:
+            keys = np.asarray(self.edges[:, 0], dtype=np.int64) * self.n_vertices + self.edges[:, 1]
+            self._edge_key_order = np.argsort(keys)
+            self._edge_keys_sorted = keys[self._edge_key_order]
+
+        vs = np.asarray(vs, dtype=np.int64)
+        vd = np.asarray(vd, dtype=np.int64)
+        keys = np.minimum(vs, vd) * self.n_vertices + np.maximum(vs, vd)
+        pos = np.minimum(np.searchsorted(self._edge_keys_sorted, keys), self.n_edges - 1)
+        found = (self._edge_keys_sorted[pos] == keys) & (np.maximum(vs, vd) < self.n_vertices)
+        assert(found.all() or not strict)
+
+        return np.where(found, self._edge_key_order[pos], -1)
+
+    @property
+    def csr_adjacency(self):
+        """(offsets, neighbors, edge_ids): neighbors of v are neighbors[offsets[v]:offsets[v + 1]]"""
+        if self._csr_adjacency is None:
+            edges = np.asarray(self.edges, dtype=np.int64)
+            ends = np.concatenate((edges[:, 0], edges[:, 1]))
+            order = np.argsort(ends, kind='stable')
+            neighbors = np.concatenate((edges[:, 1], edges[:, 0]))[order]
+            edge_ids = np.concatenate((np.arange(self.n_edges), np.arange(self.n_edges)))[order]
+
+            offsets = np.zeros(self.n_vertices + 1, dtype=np.int64)
+            np.cumsum(np.bincount(ends, minlength=self.n_vertices), out=offsets[1:])
+            self._csr_adjacency = (offsets, neighbors, edge_ids)
+        return self._csr_adjacency
+
+    @property
+    def edge_set(self):
+        if self._edge_set is None:
+            self._edge_set = set(self.edge_lookup.keys())
+        return self._edge_set
+
+    # --- Binary cache ---
+    # A cache is a directory of .npy files plus meta.json; arrays are opened
+    # with mmap_mode so that loading is O(1) and pages are shared between processes
+    CACHE_VERSION = 1
+    CACHE_ARRAYS = ('points', 'faces', 'edges', 'edge_lengths', 'face_edges')
+
+    def save_cache(self, path: str):
+        os.makedirs(path, exist_ok=True)
+
+        arrays = {
+            'points': self._points,
+            'faces': self._fv_indices,
+            'edges': self.edges,
+            'edge_lengths': self.edge_lengths,
+            'face_edges': self.fe_indices
+        }
+        for name in GraphBase.CACHE_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+        if self.vertex_order is not None:
+            np.save(os.path.join(path, "vertex_order.npy"), self.vertex_order)
+            np.save(os.path.join(path, "face_order.npy"), self.face_order)
+
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                'version': GraphBase.CACHE_VERSION,
+                'volumetric': self.volumetric,
+                'n_vertices': self.n_vertices,
+                'n_edges': self.n_edges,
+                'n_faces': self.n_faces,
+                'reordered': self.vertex_order is not None
+            }, f)
+
+        logger.info(f"GraphBase cache written to {path}")
+
+    def save_annotation(self, path: str):
+        """Writes the edge annotation next to a cache as annotation.npy, (E, dim H1) int8"""
+        assert(self.edge_annotation_words is not None)
+        os.makedirs(path, exist_ok=True)
+        np.save(
+            os.path.join(path, "annotation.npy"),
+            unpack_z2_rows(self.edge_annotation_words, self.annotation_null_vector.shape[0])
+        )
+
+    def load_annotation(self, path: str):
+        """Inverse of save_annotation"""
+        edge_annotation = np.load(os.path.join(path, "annotation.npy"))
+        assert(edge_annotation.shape[0] == self.n_edges)
+        self.set_annotation(
+            dict(zip(map(tuple, np.asarray(self.edges).tolist()), edge_annotation)),
+            np.zeros((edge_annotation.shape[1],), dtype=np.int8)
+        )
+
+    @staticmethod
+    def from_cache(path: str, mmap_mode: str = 'r'):
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+
+        if meta['version'] != GraphBase.CACHE_VERSION:
+            raise Exception(f"Unsupported cache version {meta['version']}")
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in GraphBase.CACHE_ARRAYS
+        }
+
+        graphInst = GraphBase(
+            arrays['points'], arrays['faces'], meta['volumetric'],
+            edges=arrays['edges'],
+            edge_lengths=arrays['edge_lengths'],
+            fe_indices=arrays['face_edges']
+        )
+        assert(graphInst.n_edges == meta['n_edges'])
+        if meta.get('reordered', False):
+            graphInst.vertex_order = np.load(os.path.join(path, "vertex_order.npy"))
+            graphInst.face_order = np.load(os.path.join(path, "face_order.npy"))
+        return graphInst
+
+    @staticmethod
+    def from_openmesh(mesh: om.TriMesh, copy: bool = False, reorder: str = None):
         if copy:
-            graphInst = GraphBase(np.copy(mesh.points()), np.copy(mesh.fv_indices()))
+            graphInst = GraphBase(np.copy(mesh.points()), np.copy(mesh.fv_indices()), reorder=reorder)
         else:
-            graphInst = GraphBase(mesh.points(), mesh.fv_indices())
+            graphInst = GraphBase(mesh.points(), mesh.fv_indices(), reorder=reorder)
         return graphInst
 
     @staticmethod
-    def volumetric_from_openmesh(mesh: om.TriMesh, copy: bool = False, box_margin: float = 0.5):
+    def volumetric_from_openmesh(mesh: om.TriMesh, copy: bool = False, box_margin: float = 0.5,
+                                 collapse: bool = False, shell: str = 'box', hull_scale: float = 1.1,
+                                 switches: str = "pqY", grading: float = None):
+        """Tetrahedralize the exterior of mesh inside a shell
+        collapse: reduce the complex by elementary collapses away from the surface
+        shell: 'box' (AABB grown by box_margin) or 'hull' (convex hull scaled by hull_scale)
+        switches: tetgen switches, must keep Y; "pY" (no quality refinement) gives fewest tets
+        grading: if given, sizing grows away from the surface as
+            local surface edge length + grading * distance to surface (adds m switch),
+            needs quality refinement (q switch)
+        """
         if copy:
             points = np.copy(mesh.points())
             fv_indices = np.copy(mesh.fv_indices())
@@ -191,66 +623,75 @@ class GraphBase:
             points = mesh.points()
             fv_indices = mesh.fv_indices()
 
-        num_points = points.shape[0]
-
-        # find bounding box
-        xmin = ymin = zmin = 100000.0
-        xmax = ymax = zmax = -100000.0
-
-        for point in points:
-            # print(point)
-            if point[0] < xmin:
-                xmin = point[0]
-            if point[1] < ymin:
-                ymin = point[1]
-            if point[2] < zmin:
-                zmin = point[2]
-            
-            if point[0] > xmax:
-                xmax = point[0]
-            if point[1] > ymax:
-                ymax = point[1]
-            if point[2] > zmax:
-                zmax = point[2]
-        
-        logger.info(f"AABBMin=({xmin},{ymin},{zmin}) AABBMax=({xmax},{ymax},{zmax})")
+        # Y: no Steiner points on input facets, so that every surface edge
+        # is also an edge of the tet complex
+        assert('Y' in switches)
+        if grading is not None and 'q' not in switches:
+            raise Exception(f"grading needs the q switch, got {switches}")
 
-        boxPoints, boxFacets, _, boxFacetMarkers = meshpy.geometry.make_box(
-            np.array([xmin - box_margin, ymin - box_margin, zmin - box_margin]), np.array([xmax + box_margin, ymax + box_margin, zmax + box_margin])
-        )
+        logger.info(f"AABBMin={tuple(points.min(axis=0))} AABBMax={tuple(points.max(axis=0))}")
+
+        if shell == 'box':
+            shellPoints, shellFacets = box_shell(points, box_margin)
+        elif shell == 'hull':
+            shellPoints, shellFacets = hull_shell(points, hull_scale)
+        else:
+            raise Exception(f"Unknown shell {shell}")
 
-        boxFacets = meshpy.geometry.offset_point_indices(boxFacets, len(points))
+        shellFacets = meshpy.geometry.offset_point_indices(shellFacets, len(points))
+        all_points = np.vstack((points, shellPoints))
 
         meshInfo = meshpy.tet.MeshInfo()
-        meshInfo.set_points(
-            np.vstack((
-                points,
-                boxPoints
-            ))
-        )
+        meshInfo.set_points(all_points)
 
         meshInfo.set_facets(
             [fv for fv in fv_indices.tolist()] + \
-            [fv for fv in boxFacets]
+            [fv for fv in shellFacets]
         )
 
-        # TODO: find a point inside the surface
-        meshInfo.set_holes([(0.9, 0.9, 0.9)])
-
-        mesh = meshpy.tet.build(meshInfo)
+        # one hole inside each shell, the interior is not meshed
+        meshInfo.set_holes(interior_points(points, fv_indices))
+
+        with tempfile.TemporaryDirectory() as sizing_dir:
+            if grading is not None:
+                if 'm' not in switches:
+                    switches += 'm'
+                sizing = graded_sizing(points, fv_indices, shellPoints, grading)
+                write_mtr(os.path.join(sizing_dir, "sizing"), sizing)
+                meshInfo.load_mtr(os.path.join(sizing_dir, "sizing"))
+
+            build_start = time.perf_counter()
+            mesh = meshpy.tet.build(meshInfo, options=meshpy.tet.Options(switches))
+            build_time = time.perf_counter() - build_start
+
+        tetgen_stats = {
+            'n_tetras': len(mesh.elements),
+            'n_points': len(mesh.points),
+            'n_steiner_points': len(mesh.points) - len(all_points),
+            'build_time': build_time
+        }
+        logger.info(
+            f"tetgen ({switches}, {shell}): {tetgen_stats['n_tetras']} tets, "
+            f"{tetgen_stats['n_steiner_points']} Steiner points, {build_time:.3f}s"
+        )
 
         mesh.write_vtk("tetgen_output.vtk")
 
         # tetra -> 4 faces, no orientation considered
         tet_points = np.asarray(mesh.points)
         assert(np.allclose(tet_points[0:len(points)], points))
-        num_tets = len(mesh.elements)
-        tet_fv_indices = np.ndarray((num_tets * 4, 3), dtype=np.int)
-        for idx, tetra in enumerate(mesh.elements):
-            tet_fv_indices[idx * 4] = [tetra[0], tetra[1], tetra[2]]
-            tet_fv_indices[idx * 4 + 1] = [tetra[0], tetra[1], tetra[3]]
-            tet_fv_indices[idx * 4 + 2] = [tetra[0], tetra[2], tetra[3]]
-            tet_fv_indices[idx * 4 + 3] = [tetra[1], tetra[2], tetra[3]]
+        tetras = np.asarray(mesh.elements, dtype=np.int64)
+        if collapse:
+            vertex_ids, tet_fv_indices, tet_edges = collapse_tet_complex(
+                tetras, len(tet_points), fv_indices
+            )
+            assert((vertex_ids[0:len(points)] == np.arange(len(points))).all())
+            graphInst = GraphBase(tet_points[vertex_ids], tet_fv_indices, True, edges=tet_edges)
+            graphInst.tetgen_stats = tetgen_stats
+            return graphInst
+
+        tet_fv_indices = tetras[:, [[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]]].reshape(-1, 3)
 
         graphInst = GraphBase(tet_points, tet_fv_indices, True)
+        graphInst.tetgen_stats = tetgen_stats
         return graphInst
@@ -1,57 +1,313 @@
-from .linalg import get_Bopt_column
+from .linalg import XorBasis, pack_z2_vector, unpack_z2_rows
 from .sp_tree import SpanningTree
+from .candidates import CandidatePool
+from .checkpoint import SweepCheckpoint
 from .graphbase import GraphBase
+from .cut import cut_graph, half_edge_twins
 import numpy as np
+import heapq
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class HomologyBasisOptimizer:
-    def __init__(self, graphBase: GraphBase):
+    def __init__(self, graphBase: GraphBase, spill_threshold: int = None, warm_start: bool = False,
+                 sssp: str = 'dijkstra'):
         self.graphBase = graphBase
+        self.spill_threshold = spill_threshold
+        # 'dijkstra' or 'delta_stepping'
+        if sssp not in ('dijkstra', 'delta_stepping'):
+            raise Exception(f"Unknown SSSP engine {sssp}")
+        self.sssp = sssp
+        # visit sources along a MST and repair the previous SPT
+        # instead of running Dijkstra from scratch
+        self.warm_start = warm_start
 
-    def compute_optimal_basis(self):
-        cycles = []
-        for v in range(0, self.graphBase.n_vertices):
-            sp_sptree = SpanningTree(self.graphBase)
+    def score_tree(self, sp_tree: SpanningTree, tail_free: bool = True):
+        """Score all candidates of an annotated SPT at once
+        Returns (edge_ids, cycle_lengths, annotation_words) of candidates with
+        nonzero annotation whose cycle passes through the root (if tail_free)"""
+        edges = np.asarray(self.graphBase.edges)
+        edge_ids = sp_tree.residual_edge_ids
+        vs = edges[edge_ids, 0]
+        vd = edges[edge_ids, 1]
 
-            sp_sptree.build_spt(v, True)
+        # a cycle with a tail (LCA != root) is found without tail from its LCA
+        branch = sp_tree.get_root_branch()
+        no_tail = (branch[vs] != branch[vd]) | (vs == sp_tree.root_id) | (vd == sp_tree.root_id)
 
-            # annotate all cycles & record cycle length
-            residual_edges = sp_sptree.get_residual_edges()
+        words = sp_tree.vertex_annotation_words
+        annotation_words = words[vs] ^ words[vd] ^ self.graphBase.edge_annotation_words[edge_ids]
+        keep = annotation_words.any(axis=1)
+        if tail_free:
+            keep &= no_tail
 
-            for idx, (vs, vd) in enumerate(residual_edges):
-                path = sp_sptree.get_path(vs, vd)
-                cycle_length = \
-                        self.graphBase.get_path_length(path) + \
-                        self.graphBase.get_path_length((vd, vs))
+        cycle_lengths = \
+            sp_tree.dists[vs[keep]] + sp_tree.dists[vd[keep]] + \
+            np.asarray(self.graphBase.edge_lengths)[edge_ids[keep]]
 
-                annotation = \
-                    sp_sptree.vertice_annotation[vs] ^ \
-                    sp_sptree.vertice_annotation[vd] ^ \
-                    self.graphBase.get_edge_annotation(vs, vd)
+        return edge_ids[keep], cycle_lengths, annotation_words[keep]
 
-                cycles.append(
-                    (cycle_length, path + [vs], annotation)
-                )
-        
+    def compute_optimal_basis(self, checkpoint_path: str = None, checkpoint_interval: float = 60.0):
+        """checkpoint_path: sweep state is saved there every checkpoint_interval seconds,
+        an existing checkpoint of the same mesh & annotation is resumed"""
+        # only the shortest cycle of each nonzero class can enter the basis
+        with CandidatePool(self.spill_threshold) as pool:
+            if self.warm_start:
+                mst = SpanningTree(self.graphBase)
+                mst.build_mst()
+                sources = mst.get_preorder()
+            else:
+                sources = range(0, self.graphBase.n_vertices)
+
+            checkpoint = None
+            if checkpoint_path is not None:
+                checkpoint = SweepCheckpoint(checkpoint_path, checkpoint_interval)
+                sweep = {'order': 'mst' if self.warm_start else 'index', 'n_sources': len(sources)}
+                checkpoint.load(self.graphBase, pool, sweep)
+
+            prev_sptree = None
+            n_relaxations = 0
+            for idx, v in enumerate(sources):
+                if checkpoint is not None and checkpoint.is_processed(idx):
+                    prev_sptree = None
+                    continue
+
+                sp_sptree = self.sweep_source(pool, v, prev_sptree)
+                if self.warm_start:
+                    prev_sptree = sp_sptree
+                n_relaxations += sp_sptree.n_relaxations
+
+                if checkpoint is not None:
+                    checkpoint.add_processed(idx, idx + 1)
+                    checkpoint.maybe_save(self.graphBase, pool, sweep)
+
+            if checkpoint is not None:
+                checkpoint.save(self.graphBase, pool, sweep)
+
+            cycles = pool.cycles()
         num_cycles = len(cycles)
 
-        logger.info(f"Number of candidate cycles: {num_cycles}")
+        logger.info(f"Edge relaxations: {n_relaxations}")
+        logger.info(f"Number of candidate cycles: {pool.n_offered}, "
+                    f"null-homologous: {pool.n_null}, classes kept: {num_cycles}")
         assert(num_cycles != 0)
 
-        cycles.sort(key= lambda x: x[0])
+        return self.select_basis(cycles)
+
+    def compute_basis_anytime(self, time_budget: float):
+        """Sweep sources farthest-first until @time_budget seconds elapse
+
+        Returns (basis_cycles, info). basis_cycles may be incomplete if the budget
+        expires before dim H1 independent candidates are found; info has keys
+        complete, fraction_processed, covering_radius and optimality_gap.
+
+        Every cycle C is homologous to a closed walk from a processed source of
+        length <= len(C) + 2 * covering_radius, which splits into fundamental cycles
+        no longer than the walk. So each basis cycle is at most 2 * covering_radius
+        longer than its optimal counterpart, optimality_gap bounds the total excess.
+        Cycles with tails are kept as candidates here, their loops are the tail-free
+        ones from get_path.
+        """
+        start_time = time.perf_counter()
+        n_vertices = self.graphBase.n_vertices
+        # distance to the nearest processed source
+        cover_dists = np.full(n_vertices, np.inf)
+        n_processed = 0
+        v = 0
+        with CandidatePool(self.spill_threshold) as pool:
+            while True:
+                sp_sptree = self.sweep_source(pool, v, tail_free=False)
 
-        anno_matrix = np.ndarray(
-                        (cycles[0][2].shape[0], num_cycles),
-                        dtype=np.int8
-                    )
-        for idx, cycleTuple in enumerate(cycles):
-            anno_matrix[:, idx] = cycleTuple[2]
-        
-        pivots = get_Bopt_column(anno_matrix)
-        assert(len(pivots) == cycles[0][2].shape[0])
+                n_processed += 1
+                np.minimum(cover_dists, sp_sptree.dists, out=cover_dists)
+                v = int(np.argmax(cover_dists))
+                if cover_dists[v] == 0 or time.perf_counter() - start_time > time_budget:
+                    break
 
-        return [
-            cycles[idx] for idx in pivots
+            cycles = pool.cycles()
+        basis_cycles = self.select_basis(cycles, require_full=False) if len(cycles) > 0 else []
+        # report actual lengths of the (tail-free) loops
+        basis_cycles = [
+            (self.graphBase.get_path_length(path), path, annotation)
+            for _, path, annotation in basis_cycles
         ]
+        basis_cycles.sort(key=lambda cycle: cycle[0])
+
+        dim_h1 = self.graphBase.annotation_null_vector.shape[0]
+        covering_radius = float(cover_dists.max())
+        info = {
+            'complete': len(basis_cycles) == dim_h1,
+            'fraction_processed': n_processed / n_vertices,
+            'covering_radius': covering_radius,
+            'optimality_gap': 2 * covering_radius * len(basis_cycles),
+        }
+        logger.info(f"Processed {n_processed} / {n_vertices} sources in "
+                    f"{time.perf_counter() - start_time:.3f}s, covering radius {covering_radius:.5f}")
+
+        return basis_cycles, info
+
+    def compute_shortest_loop(self):
+        """Shortest cycle with nonzero annotation, (cycle_length, path, annotation),
+        None if there is none
+
+        Sources are searched one by one, each on the graph without the sources
+        before it. If the shortest loop L avoids those and passes through the
+        source, one of the source's fundamental cycles over the edges of L has
+        nonzero annotation and length <= len(L), so the result is exact. Against
+        the best length B so far, a search stops at distance B / 2: a cycle closed
+        through a farther vertex is at least B long. No other candidates are kept.
+
+        On a closed surface only the vertices of a cut graph are sources: a cycle
+        avoiding them lies in a disk, its annotation is zero.
+        """
+        start_time = time.perf_counter()
+        graphBase = self.graphBase
+        n_vertices = graphBase.n_vertices
+        offsets, neighbors, edge_ids = (array.tolist() for array in graphBase.csr_adjacency)
+        lengths = np.asarray(graphBase.edge_lengths).tolist()
+        edge_words = [
+            int.from_bytes(words.astype('<u8').tobytes(), 'little')
+            for words in graphBase.edge_annotation_words
+        ]
+
+        sources = range(0, n_vertices)
+        if not graphBase.volumetric and (half_edge_twins(graphBase._fv_indices)[0] >= 0).all():
+            sources = np.unique(cut_graph(graphBase._fv_indices)).tolist()
+        logger.info(f"{len(sources)} of {n_vertices} vertices as sources")
+
+        removed = [False] * n_vertices
+        best_length, best_path, best_word = np.inf, None, 0
+        n_relaxations = 0
+        for s in sources:
+            dists = {s: 0.0}
+            parents = {s: (-1, -1)}
+            # packed annotation of the tree path from s, for settled vertices
+            words = {}
+            work_heap = [(0.0, s)]
+            while len(work_heap) > 0:
+                d, u = heapq.heappop(work_heap)
+                if u in words:
+                    continue
+                if 2 * d >= best_length:
+                    break
+                parent, parent_edge = parents[u]
+                words[u] = 0 if parent < 0 else words[parent] ^ edge_words[parent_edge]
+
+                for slot in range(offsets[u], offsets[u + 1]):
+                    w = neighbors[slot]
+                    if removed[w]:
+                        continue
+                    e = edge_ids[slot]
+                    n_relaxations += 1
+                    if w in words:
+                        # non-tree edge between settled vertices closes a cycle
+                        word = words[u] ^ words[w] ^ edge_words[e]
+                        if e != parent_edge and word != 0 and d + lengths[e] + dists[w] < best_length:
+                            best_path = self.tree_loop(parents, u, w)
+                            best_length, best_word = graphBase.get_path_length(best_path), word
+                        continue
+
+                    alt = d + lengths[e]
+                    if 2 * alt < best_length and alt < dists.get(w, np.inf):
+                        dists[w] = alt
+                        parents[w] = (u, e)
+                        heapq.heappush(work_heap, (alt, w))
+            removed[s] = True
+
+        logger.info(f"Shortest loop {best_length:.5f} in {time.perf_counter() - start_time:.3f}s, "
+                    f"edge relaxations: {n_relaxations}")
+        if best_path is None:
+            return None
+
+        dim_h1 = graphBase.annotation_null_vector.shape[0]
+        n_words = graphBase.edge_annotation_words.shape[1]
+        words = np.frombuffer(best_word.to_bytes(8 * n_words, 'little'), dtype='<u8')
+        return (best_length, best_path, unpack_z2_rows(words[None, :], dim_h1)[0])
+
+    @staticmethod
+    def tree_loop(parents: dict, vs: int, vd: int):
+        """Closed path vs -> LCA -> vd -> vs over parents {vertex: (parent, edge)}, tail removed"""
+        spath, epath = [vs], [vd]
+        while parents[spath[-1]][0] >= 0:
+            spath.append(parents[spath[-1]][0])
+        while parents[epath[-1]][0] >= 0:
+            epath.append(parents[epath[-1]][0])
+
+        lca = spath[-1]
+        while len(spath) > 0 and len(epath) > 0 and spath[-1] == epath[-1]:
+            lca = spath.pop()
+            epath.pop()
+        return spath + [lca] + epath[::-1] + [vs]
+
+    def sweep_source(self, pool: CandidatePool, v: int, prev_sptree: SpanningTree = None,
+                     tail_free: bool = True):
+        """Offer the candidates of the SPT at v to pool, returns the SPT
+        prev_sptree: SPT to repair instead of building from scratch"""
+        sp_sptree = SpanningTree(self.graphBase)
+        if prev_sptree is None:
+            self.build_spt(sp_sptree, v)
+        else:
+            sp_sptree.build_spt_from(prev_sptree, v, True)
+
+        edge_ids, cycle_lengths, annotation_words = self.score_tree(sp_sptree, tail_free)
+        pool.count_skipped(len(sp_sptree.residual_edge_ids) - len(edge_ids))
+        self.offer_candidates(pool, sp_sptree, edge_ids, cycle_lengths, annotation_words)
+        return sp_sptree
+
+    def sweep_range(self, pool: CandidatePool, start: int, end: int):
+        """Sweep sources start..end-1, returns number of edge relaxations"""
+        prev_sptree = None
+        n_relaxations = 0
+        for v in range(start, end):
+            sp_sptree = self.sweep_source(pool, v, prev_sptree)
+            if self.warm_start:
+                prev_sptree = sp_sptree
+            n_relaxations += sp_sptree.n_relaxations
+        return n_relaxations
+
+    def build_spt(self, sp_tree: SpanningTree, start: int):
+        if self.sssp == 'delta_stepping':
+            sp_tree.build_spt_delta(start, True)
+        else:
+            sp_tree.build_spt(start, True, level_order=True)
+
+    def offer_candidates(self, pool: CandidatePool, sp_tree: SpanningTree,
+                         edge_ids: np.ndarray, cycle_lengths: np.ndarray, annotation_words: np.ndarray):
+        """Offer the shortest scored candidate of each class in the tree to pool,
+        paths are only built for candidates pool keeps"""
+        if len(edge_ids) == 0:
+            return
+
+        dim_h1 = self.graphBase.annotation_null_vector.shape[0]
+        _, classes = np.unique(annotation_words, axis=0, return_inverse=True)
+        classes = classes.reshape(-1)
+        order = np.lexsort((cycle_lengths, classes))
+        first = order[np.concatenate(([True], classes[order][1:] != classes[order][:-1]))]
+
+        for idx in first[np.argsort(cycle_lengths[first], kind='stable')].tolist():
+            key = int.from_bytes(annotation_words[idx].astype('<u8').tobytes(), 'little')
+            cycle_length = float(cycle_lengths[idx])
+            if not pool.improves(key, cycle_length):
+                continue
+
+            vs, vd = self.graphBase.edges[edge_ids[idx]].tolist()
+            path = sp_tree.get_path(vs, vd)
+            annotation = unpack_z2_rows(annotation_words[idx:idx + 1], dim_h1)[0]
+            pool.offer(key, (cycle_length, path + [vs], annotation))
+
+    def select_basis(self, cycles: list, require_full: bool = True):
+        """cycles sorted by length"""
+        # greedy over the sorted cycles: keep those independent of shorter ones
+        dim_h1 = cycles[0][2].shape[0]
+        xor_basis = XorBasis(dim_h1)
+        basis_cycles = []
+        for cycleTuple in cycles:
+            if xor_basis.insert(pack_z2_vector(cycleTuple[2])):
+                basis_cycles.append(cycleTuple)
+                if xor_basis.is_full():
+                    break
+
+        assert(xor_basis.is_full() or not require_full)
+        return basis_cycles
@@ -1,12 +1,23 @@
 import numpy as np
 
+# matrices with at least this many entries are eliminated with Method of Four Russians
+M4RI_THRESHOLD = 1 << 16
+# max number of pivot columns processed per block (table size 2^k)
+M4RI_K = 8
+
 def check_z2(A: np.ndarray):
     """Check if given matrix is in Z_2"""
     return ((A == 1) + (A == 0)).all()
 
-# https://math.stackexchange.com/questions/3073083/how-to-reduce-matrix-into-row-echelon-form-in-numpy/3073117
 def get_Bopt_column(A_input: np.ndarray):
     """Get first rank(A) linear independent column vectors of A over Z_2"""
+    if A_input.size >= M4RI_THRESHOLD:
+        return get_Bopt_column_m4ri(A_input)
+    return get_Bopt_column_rowwise(A_input)
+
+# https://math.stackexchange.com/questions/3073083/how-to-reduce-matrix-into-row-echelon-form-in-numpy/3073117
+def get_Bopt_column_rowwise(A_input: np.ndarray):
+    """get_Bopt_column, eliminating one pivot at a time"""
     A = A_input.copy()
     assert(check_z2(A))
 
@@ -42,17 +53,193 @@ def get_Bopt_column(A_input: np.ndarray):
     return pivot_column
 
 def solve_z2_sequential(A_input: np.ndarray, Z: np.ndarray):
+    """Solve AX = Z over Z_2, A must have full column rank
+    (inverting over the reals is only exact when det(A) = +-1)"""
     m, n = A_input.shape
     assert(m > n)
-    row_pivot = get_Bopt_column(A_input.T)
-    assert(len(row_pivot) == n)
 
-    X = np.linalg.inv(A_input[row_pivot, :]) @ Z[row_pivot, :]
+    return solve_z2_m4ri(A_input, Z)
 
-    result = (np.round(X) % 2).astype(np.int8)
-    #assert(np.allclose(result, solve_z2_sequential_slow(A_input, Z)))
+# --- Method of Four Russians over bit-packed rows ---
+def pack_z2_rows(A: np.ndarray):
+    """Pack each row of (m x n) Z_2 matrix into (m x ceil(n / 64)) uint64,
+    column j goes to bit (j % 64) of word (j // 64)"""
+    m, n = A.shape
+    n_words = (n + 63) // 64
+    bits = np.zeros((m, n_words * 64), dtype=np.uint8)
+    bits[:, :n] = A
+    packed = np.packbits(bits, axis=1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64)
+
+def unpack_z2_rows(P: np.ndarray, n: int):
+    """Inverse of pack_z2_rows"""
+    bits = np.unpackbits(
+        P.astype('<u8').view(np.uint8), axis=1, bitorder='little'
+    )
+    return bits[:, :n].astype(np.int8)
+
+def odd_z2_rows(P: np.ndarray):
+    """(m,) bool, whether each packed row has an odd number of set bits"""
+    folded = np.bitwise_xor.reduce(P.astype(np.uint64), axis=1)
+    for shift in (32, 16, 8, 4, 2, 1):
+        folded ^= folded >> np.uint64(shift)
+    return (folded & np.uint64(1)) == 1
+
+def _m4ri_table(rows: np.ndarray):
+    """All 2^k XOR combinations of k packed rows, indexed by bitmask"""
+    k, n_words = rows.shape
+    table = np.zeros((1 << k, n_words), dtype=np.uint64)
+    for j in range(0, k):
+        table[(1 << j):(1 << (j + 1))] = table[0:(1 << j)] ^ rows[j]
+    return table
+
+def _m4ri_table_index(P: np.ndarray, word: int, cols: list):
+    """Bitmask of P's entries in given columns (all within word)"""
+    idx = np.zeros(P.shape[0], dtype=np.int64)
+    for j, c in enumerate(cols):
+        idx |= ((P[:, word] >> np.uint64(c % 64)) & np.uint64(1)).astype(np.int64) << j
+    return idx
+
+def m4ri_echelon(P: np.ndarray, n_pivot_cols: int, k: int = M4RI_K, reduced: bool = False):
+    """Blocked Gaussian elimination over packed rows P, pivots searched
+    in the first n_pivot_cols columns only.
+    Returns (pivot_column, pivot_rows), pivot_rows[i] has its leading one
+    in pivot_column[i]; with reduced=True pivot_rows is in reduced echelon form"""
+    active = P.copy()
+    n_words = P.shape[1]
+    pivot_rows = np.zeros((0, n_words), dtype=np.uint64)
+    pivot_column = []
 
-    return result
+    working_col = 0
+    while working_col < n_pivot_cols and active.shape[0] > 0:
+        # find up to k pivots inside current word, eliminating on that word only
+        word = working_col // 64
+        word_end = min((word + 1) * 64, n_pivot_cols)
+        w = active[:, word].copy()
+        taken = np.zeros(active.shape[0], dtype=bool)
+
+        block_cols = []
+        block_rows = []
+        while working_col < word_end and len(block_cols) < k:
+            bit = np.uint64(1) << np.uint64(working_col % 64)
+            candidates = np.flatnonzero(((w & bit) != 0) & ~taken)
+            if len(candidates) > 0:
+                i = candidates[0]
+                taken[i] = True
+                w[candidates[1:]] ^= w[i]
+                block_cols.append(working_col)
+                block_rows.append(i)
+            working_col += 1
+
+        if len(block_cols) == 0:
+            continue
+
+        # replay elimination on the full pivot rows, then reduce them mutually
+        R = active[block_rows]
+        kb = len(block_cols)
+        for j in range(0, kb):
+            for t in range(0, j):
+                if (R[j, word] >> np.uint64(block_cols[t] % 64)) & np.uint64(1):
+                    R[j] ^= R[t]
+        for j in range(kb - 1, -1, -1):
+            for t in range(0, j):
+                if (R[t, word] >> np.uint64(block_cols[j] % 64)) & np.uint64(1):
+                    R[t] ^= R[j]
+
+        # one table lookup + XOR per row clears all kb pivot columns
+        table = _m4ri_table(R)
+        active = active[~taken]
+        active ^= table[_m4ri_table_index(active, word, block_cols)]
+        if reduced:
+            pivot_rows ^= table[_m4ri_table_index(pivot_rows, word, block_cols)]
+
+        pivot_rows = np.vstack((pivot_rows, R))
+        pivot_column += block_cols
+
+    return pivot_column, pivot_rows
+
+def get_Bopt_column_m4ri(A_input: np.ndarray, k: int = M4RI_K):
+    """get_Bopt_column with Method of Four Russians"""
+    assert(check_z2(A_input))
+    pivot_column, _ = m4ri_echelon(pack_z2_rows(A_input), A_input.shape[1], k)
+    return pivot_column
+
+def solve_z2_m4ri(A_input: np.ndarray, Z: np.ndarray, k: int = M4RI_K):
+    """Solve AX = Z over Z_2 for A with full column rank, Z must be in span(A)"""
+    m, n = A_input.shape
+    assert(Z.shape[0] == m)
+
+    pivot_column, pivot_rows = m4ri_echelon(
+        pack_z2_rows(np.hstack((A_input, Z))), n, k, reduced=True
+    )
+    assert(pivot_column == list(range(0, n)))
+
+    return unpack_z2_rows(pivot_rows, n + Z.shape[1])[:, n:]
+
+# --- Online independence test over packed vectors ---
+def pack_z2_vector(vec: np.ndarray):
+    """Pack Z_2 vector into a python int, vec[i] goes to bit i"""
+    return int.from_bytes(
+        np.packbits(np.asarray(vec, dtype=np.uint8), bitorder='little').tobytes(),
+        'little'
+    )
+
+def unpack_z2_vector(word: int, dim: int):
+    """Inverse of pack_z2_vector"""
+    return np.unpackbits(
+        np.frombuffer(word.to_bytes((dim + 7) // 8, 'little'), dtype=np.uint8),
+        count=dim, bitorder='little'
+    ).astype(np.int8)
+
+class XorBasis:
+    """Reduced basis of packed Z_2 vectors, grown one vector at a time"""
+    def __init__(self, dim: int):
+        self.dim = dim
+        # leading bit -> basis word
+        self.basis = {}
+
+    def rank(self):
+        return len(self.basis)
+
+    def is_full(self):
+        return len(self.basis) == self.dim
+
+    def reduce(self, word: int):
+        """Reduce word by the basis, uses at most rank() XORs"""
+        while word != 0:
+            lead = word.bit_length() - 1
+            if lead not in self.basis:
+                break
+            word ^= self.basis[lead]
+        return word
+
+    def insert(self, word: int):
+        """Add word to basis if independent, returns whether it was added"""
+        word = self.reduce(word)
+        if word == 0:
+            return False
+
+        self.basis[word.bit_length() - 1] = word
+        return True
+
+    def parity_check(self):
+        """For rank() == dim - 1: the nonzero word f with popcount(f & b) even for all b
+        in the span, so a word extends the basis to full rank iff popcount(f & word) is odd"""
+        assert(self.rank() == self.dim - 1)
+
+        # fully reduced rows: no row has another row's leading bit
+        rows = dict(self.basis)
+        for lead in sorted(rows.keys()):
+            for other in rows.keys():
+                if other != lead and (rows[other] >> lead) & 1:
+                    rows[other] ^= rows[lead]
+
+        free = next(bit for bit in range(0, self.dim) if bit not in rows)
+        f = 1 << free
+        for lead, row in rows.items():
+            if (row >> free) & 1:
+                f |= 1 << lead
+        return f
 
 # TODO: pre-calculate factorization
 def solve_z2_sequential_slow(A_input: np.ndarray, Z: np.ndarray):
@@ -0,0 +1,115 @@
+"""
+Handle / tunnel classification by linking numbers, no tetrahedralization
+
+Each loop l is pushed off the surface along the vertex normals, into the
+inside (l-) and into the outside (l+). Against reference loops r_j spanning
+H_1 of the surface, lk(l-, r_j+) all vanish iff l is null in H_1 of the inside,
+lk(l+, r_j-) all vanish iff l is null in H_1 of the outside (Alexander duality).
+Handle loops bound inside, tunnel loops bound outside.
+
+Linking numbers of polygons are sums of signed solid angles over segment pairs,
+evaluated in chunks of segment pairs.
+"""
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+def vertex_normals(points: np.ndarray, fv_indices: np.ndarray):
+    """Area weighted unit normals, pointing outwards for closed meshes"""
+    points = np.asarray(points, dtype=np.float64)
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    tri = points[fv_indices]
+    face_normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+
+    normals = np.zeros_like(points)
+    for k in range(0, 3):
+        np.add.at(normals, fv_indices[:, k], face_normals)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-300)[:, None]
+
+    # inward oriented faces give a negative volume
+    if np.einsum('ij,ij->', tri[:, 0], face_normals) < 0:
+        normals = -normals
+    return normals
+
+def push_off(points: np.ndarray, fv_indices: np.ndarray, paths: list, scale: float = 0.25):
+    """Returns (inner, outer) polygons of the closed vertex paths, vertices moved by
+    scale times their shortest incident edge along the normals"""
+    points = np.asarray(points, dtype=np.float64)
+    fv_indices = np.asarray(fv_indices, dtype=np.int64)
+    vs = fv_indices.reshape(-1)
+    vd = fv_indices[:, [1, 2, 0]].reshape(-1)
+
+    shortest = np.full(len(points), np.inf)
+    np.minimum.at(shortest, vs, np.linalg.norm(points[vs] - points[vd], axis=1))
+    offsets = vertex_normals(points, fv_indices) * (scale * shortest)[:, None]
+
+    inner, outer = [], []
+    for path in paths:
+        path = np.asarray(path, dtype=np.int64)
+        inner.append(points[path] - offsets[path])
+        outer.append(points[path] + offsets[path])
+    return inner, outer
+
+def linking_number(curve_a: np.ndarray, curve_b: np.ndarray, chunk_size: int = 1 << 20):
+    """Gauss linking number of two disjoint closed polygons, (n + 1, 3) with the
+    first point repeated at the end; at most chunk_size segment pairs at once"""
+    a0, a1 = curve_a[:-1], curve_a[1:]
+    b0, b1 = curve_b[:-1], curve_b[1:]
+    rows = max(1, chunk_size // len(b0))
+
+    total = 0.0
+    for start in range(0, len(a0), rows):
+        r1 = a0[start:start + rows, None, :]
+        r2 = a1[start:start + rows, None, :]
+        r13, r14 = b0[None] - r1, b1[None] - r1
+        r23, r24 = b0[None] - r2, b1[None] - r2
+
+        # solid angle of the quadrilateral spanned by the two segments
+        n = [np.cross(r13, r14), np.cross(r14, r24), np.cross(r24, r23), np.cross(r23, r13)]
+        n = [v / np.maximum(np.linalg.norm(v, axis=2, keepdims=True), 1e-300) for v in n]
+        omega = sum(
+            np.arcsin(np.clip(np.einsum('ijk,ijk->ij', n[k], n[(k + 1) % 4]), -1.0, 1.0))
+            for k in range(0, 4)
+        )
+        sign = np.sign(np.einsum('ijk,ijk->ij', np.cross(b1 - b0, r2 - r1), r13))
+        total += (omega * sign).sum()
+    return total / (4 * np.pi)
+
+def linking_matrix(inner: list, outer: list, chunk_size: int = 1 << 20):
+    """lk[i, j] = linking number of inner[i] & outer[j], rounded"""
+    lk = np.zeros((len(inner), len(outer)), dtype=np.int64)
+    for i, curve_a in enumerate(inner):
+        for j, curve_b in enumerate(outer):
+            value = linking_number(curve_a, curve_b, chunk_size)
+            if abs(value - np.round(value)) > 0.1:
+                logger.warning(f"Linking number {value:.3f} of loops {i} & {j} is not an integer")
+            lk[i, j] = np.round(value)
+    return lk
+
+def classify_loops(points: np.ndarray, fv_indices: np.ndarray, paths: list, reference: list = None,
+                   scale: float = 0.25, chunk_size: int = 1 << 20):
+    """Label each closed vertex path 'handle', 'tunnel', 'mixed' (nontrivial inside
+    & outside) or 'trivial'
+    reference: closed paths spanning H_1 of the surface, defaults to paths
+    Returns (labels, inside, outside), inside[i, j] = lk(paths[i]-, reference[j]+),
+    outside[i, j] = lk(paths[i]+, reference[j]-)"""
+    inner, outer = push_off(points, fv_indices, paths, scale)
+    if reference is None:
+        inside = linking_matrix(inner, outer, chunk_size)
+        outside = inside.T
+    else:
+        reference_inner, reference_outer = push_off(points, fv_indices, reference, scale)
+        inside = linking_matrix(inner, reference_outer, chunk_size)
+        outside = linking_matrix(reference_inner, outer, chunk_size).T
+
+    labels = []
+    for i in range(0, len(paths)):
+        labels.append({
+            (False, True): 'handle',
+            (True, False): 'tunnel',
+            (True, True): 'mixed',
+            (False, False): 'trivial'
+        }[(bool((inside[i] != 0).any()), bool((outside[i] != 0).any()))])
+    return labels, inside, outside
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Load test of a running handle loop service
+
+Sends n_requests basis requests with the mesh file bytes from concurrency
+client threads, one connection each, and reports throughput & latency.
+--vary appends a comment per request so that results are not served from cache.
+
+python -m mesh_cut.handle_loop.load_test address mesh_path n_requests concurrency [--vary]
+"""
+
+from mesh_cut.handle_loop.service import ServiceClient
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import threading
+import logging
+import time
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+def run_load_test(address: str, data: bytes, mesh_format: str, n_requests: int, concurrency: int,
+                  vary: bool = False, **options):
+    """Returns per request latencies in seconds and the total wall time"""
+    local = threading.local()
+    clients = []
+
+    def request(idx):
+        if not hasattr(local, 'client'):
+            local.client = ServiceClient(address)
+            clients.append(local.client)
+        # obj comments keep the mesh but change its digest
+        payload = data + f"\n# request {idx}\n".encode() if vary else data
+        start_time = time.perf_counter()
+        local.client.basis(data=payload, mesh_format=mesh_format, **options)
+        return time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(request, range(0, n_requests)))
+    finally:
+        for client in clients:
+            client.close()
+    return np.array(latencies), time.perf_counter() - start_time
+
+def main(options):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)40s - %(levelname)s - %(message)s')
+
+    vary = '--vary' in options
+    options = [option for option in options if option != '--vary']
+    if len(options) != 4:
+        print(f"Options: address mesh_path n_requests concurrency [--vary]")
+        sys.exit(1)
+
+    address, mesh_path, n_requests, concurrency = options[0], options[1], int(options[2]), int(options[3])
+    with open(mesh_path, 'rb') as f:
+        data = f.read()
+    mesh_format = os.path.splitext(mesh_path)[1][1:].lower()
+    if vary and mesh_format != 'obj':
+        raise Exception("--vary needs an obj mesh")
+
+    latencies, wall_time = run_load_test(address, data, mesh_format, n_requests, concurrency, vary)
+    logger.info(f"{n_requests} requests in {wall_time:.3f}s, {n_requests / wall_time:.2f} req/s")
+    for q in (50, 90, 99):
+        logger.info(f"p{q} latency: {np.percentile(latencies, q) * 1000:.1f}ms")
+    logger.info(f"max latency: {latencies.max() * 1000:.1f}ms")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
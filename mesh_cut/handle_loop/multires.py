@@ -0,0 +1,242 @@
+"""
+Coarse-to-fine handle loops
+
+1. decimate the mesh with topology preserving (half-edge) collapses, fine vertices
+   are mapped to the coarse vertex of their geodesic Voronoi cell
+2. annotate & compute the optimal basis on the coarse mesh
+3. lift every coarse loop to the fine mesh, then shorten it within a tubular
+   neighborhood, keeping the basis independent on the fine mesh
+"""
+
+from .homology_opt import HomologyBasisOptimizer
+from .annotator import TreeCotreeAnnotator
+from .sp_tree import SpanningTree
+from .graphbase import GraphBase
+from .linalg import XorBasis, pack_z2_vector, odd_z2_rows, unpack_z2_rows, unpack_z2_vector
+import openmesh as om
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+def decimate(mesh: om.TriMesh, n_target: int):
+    """Quadric decimation down to n_target vertices
+    Returns (coarse_mesh, coarse_to_fine), coarse_to_fine: (V_coarse,) fine vertex ids"""
+    coarse_mesh = om.TriMesh(mesh.points(), mesh.face_vertex_indices())
+    coarse_mesh.set_vertex_property_array('fine_idx', np.arange(mesh.n_vertices()))
+
+    decimater = om.TriMeshDecimater(coarse_mesh)
+    quadric = om.TriMeshModQuadricHandle()
+    decimater.add(quadric)
+    decimater.module(quadric).unset_max_err()
+    decimater.initialize()
+    decimater.decimate_to(n_target)
+    coarse_mesh.garbage_collection()
+
+    # half-edge collapses keep the surviving vertices in place
+    coarse_to_fine = coarse_mesh.vertex_property_array('fine_idx').astype(np.int64)
+    return coarse_mesh, coarse_to_fine
+
+def nearest_sources(graphBase: GraphBase, sources: np.ndarray):
+    """Multi-source shortest paths, returns (dists, label): label[v] is the index
+    in sources of the nearest one. Frontier based Bellman-Ford on the CSR arrays"""
+    offsets, neighbors, edge_ids = graphBase.csr_adjacency
+    lengths = np.asarray(graphBase.edge_lengths)[edge_ids]
+    degrees = np.diff(offsets)
+
+    dists = np.full(graphBase.n_vertices, np.inf)
+    label = np.full(graphBase.n_vertices, -1, dtype=np.int64)
+    dists[sources] = 0
+    label[sources] = np.arange(len(sources))
+
+    frontier = np.asarray(sources, dtype=np.int64)
+    while len(frontier) > 0:
+        counts = degrees[frontier]
+        slots = np.repeat(offsets[frontier] - np.cumsum(counts) + counts, counts) + \
+            np.arange(counts.sum())
+        srcs = np.repeat(frontier, counts)
+        dsts = neighbors[slots]
+        alts = dists[srcs] + lengths[slots]
+
+        improving = alts < dists[dsts]
+        srcs, dsts, alts = srcs[improving], dsts[improving], alts[improving]
+        np.minimum.at(dists, dsts, alts)
+        won = alts == dists[dsts]
+        label[dsts[won]] = label[srcs[won]]
+        frontier = np.unique(dsts[won])
+
+    return dists, label
+
+def tube_graph(graphBase: GraphBase, vertex_mask: np.ndarray):
+    """Sub GraphBase on the masked vertices, returns (subGraphBase, sub_to_full)"""
+    sub_to_full = np.flatnonzero(vertex_mask)
+    full_to_sub = np.full(graphBase.n_vertices, -1, dtype=np.int64)
+    full_to_sub[sub_to_full] = np.arange(len(sub_to_full))
+
+    faces = np.asarray(graphBase._fv_indices)
+    faces = full_to_sub[faces[vertex_mask[faces].all(axis=1)]]
+    edges = np.asarray(graphBase.edges)
+    edge_mask = vertex_mask[edges].all(axis=1)
+
+    # a tube is no closed surface
+    subGraphBase = GraphBase(
+        np.asarray(graphBase._points)[sub_to_full], faces,
+        edges=full_to_sub[edges[edge_mask]],
+        edge_lengths=np.asarray(graphBase.edge_lengths)[edge_mask],
+        check_genus=False
+    )
+
+    dim_h1 = graphBase.annotation_null_vector.shape[0]
+    edge_annotation = unpack_z2_rows(graphBase.edge_annotation_words[edge_mask], dim_h1)
+    subGraphBase.set_annotation(
+        dict(zip(map(tuple, subGraphBase.edges.tolist()), edge_annotation)),
+        graphBase.annotation_null_vector
+    )
+    return subGraphBase, sub_to_full
+
+class MultiresolutionOptimizer:
+    """Optimal basis on a decimated mesh, lifted & shortened on the full one"""
+    def __init__(self, mesh: om.TriMesh, n_coarse: int, tube_rings: int = None,
+                 tube_sources: int = 32, annotate=None, max_shorten_iters: int = 3,
+                 optimizer_options: dict = None):
+        """
+        n_coarse: target vertex count of the coarse mesh
+        tube_rings: width of the tubular neighborhood in edge rings,
+            defaults to 2 * sqrt(n_fine / n_coarse)
+        tube_sources: number of SPTs per tube, sources are spread farthest-first
+        annotate: (mesh, graphBase) -> (annotation, null_vector), defaults to tree-cotree
+        optimizer_options: HomologyBasisOptimizer keyword arguments for the coarse level
+        """
+        self.mesh = mesh
+        self.n_coarse = n_coarse
+        self.tube_rings = tube_rings if tube_rings is not None else \
+            max(2, int(np.ceil(2 * np.sqrt(mesh.n_vertices() / n_coarse))))
+        self.annotate = annotate if annotate is not None else \
+            (lambda mesh, graphBase: TreeCotreeAnnotator(graphBase).compute_annotation())
+        self.tube_sources = tube_sources
+        self.max_shorten_iters = max_shorten_iters
+        self.optimizer_options = {} if optimizer_options is None else optimizer_options
+
+    def compute_basis(self):
+        """Returns [(cycle_length, path, annotation)] on the fine mesh, sorted by length,
+        annotations are the fine ones"""
+        fineGraphBase = GraphBase.from_openmesh(self.mesh)
+        fineGraphBase.set_annotation(*self.annotate(self.mesh, fineGraphBase))
+
+        coarse_mesh, coarse_to_fine = decimate(self.mesh, self.n_coarse)
+        coarseGraphBase = GraphBase.from_openmesh(coarse_mesh)
+        if coarseGraphBase.genus != fineGraphBase.genus:
+            raise Exception(f"Decimation changed genus {fineGraphBase.genus} -> {coarseGraphBase.genus}")
+        coarseGraphBase.set_annotation(*self.annotate(coarse_mesh, coarseGraphBase))
+
+        coarse_cycles = HomologyBasisOptimizer(coarseGraphBase, **self.optimizer_options).compute_optimal_basis()
+        _, fine_to_coarse = nearest_sources(fineGraphBase, coarse_to_fine)
+
+        paths = [
+            self.lift_path(fineGraphBase, coarse_path, coarse_to_fine, fine_to_coarse)
+            for _, coarse_path, _ in coarse_cycles
+        ]
+        path_words = [self.path_word(fineGraphBase, path) for path in paths]
+
+        # each loop may move to any class that keeps the basis independent
+        # of the loops already shortened and the lifted ones still to come
+        dim_h1 = fineGraphBase.annotation_null_vector.shape[0]
+        cycles = []
+        for i, path in enumerate(paths):
+            others = XorBasis(dim_h1)
+            for word in [pack_z2_vector(cycle[2]) for cycle in cycles] + path_words[i + 1:]:
+                others.insert(word)
+            if others.rank() != dim_h1 - 1:
+                raise Exception("Lifted loops are not independent on the fine mesh")
+
+            cycle = self.shorten_loop(fineGraphBase, path, others.parity_check())
+            logger.info(f"Coarse loop {coarse_cycles[i][0]:.5f} lifted & shortened to {cycle[0]:.5f}")
+            cycles.append(cycle)
+
+        cycles.sort(key=lambda cycle: cycle[0])
+        return cycles
+
+    @staticmethod
+    def path_word(graphBase: GraphBase, path: list):
+        """Packed annotation (python int) of closed path"""
+        path_edges = graphBase.edge_index(path[:-1], path[1:])
+        words = np.bitwise_xor.reduce(graphBase.edge_annotation_words[path_edges], axis=0)
+        return int.from_bytes(words.astype('<u8').tobytes(), 'little')
+
+    def lift_path(self, fineGraphBase: GraphBase, coarse_path: list,
+                  coarse_to_fine: np.ndarray, fine_to_coarse: np.ndarray):
+        """Closed coarse path -> closed fine path, each coarse edge becomes a shortest
+        path within the Voronoi cells of its end points (whole mesh if those don't connect)"""
+        path = [int(coarse_to_fine[coarse_path[0]])]
+        for cs, cd in zip(coarse_path[:-1], coarse_path[1:]):
+            vs, vd = int(coarse_to_fine[cs]), int(coarse_to_fine[cd])
+            sp_tree = SpanningTree(fineGraphBase)
+            sp_tree.build_spt_delta(vs, False, vertex_mask=np.isin(fine_to_coarse, (cs, cd)))
+            if sp_tree.dists[vd] == np.inf:
+                sp_tree = SpanningTree(fineGraphBase)
+                sp_tree.build_spt_delta(vs, False)
+            path += sp_tree.get_path(vs, vd)[1:]
+        return path
+
+    def shorten_loop(self, fineGraphBase: GraphBase, path: list, parity_check: int):
+        """Shortest loop in a tube around closed @path whose annotation has odd parity
+        with @parity_check (path's own has), repeated on the new loop while it gets shorter
+        Returns (cycle_length, path, annotation)"""
+        edges = np.asarray(fineGraphBase.edges)
+        n_words = fineGraphBase.edge_annotation_words.shape[1]
+        check_words = np.frombuffer(parity_check.to_bytes(8 * n_words, 'little'), dtype='<u8')
+
+        path_edges = fineGraphBase.edge_index(path[:-1], path[1:])
+        best = (float(np.sum(fineGraphBase.edge_lengths[path_edges])), path)
+
+        for _ in range(0, self.max_shorten_iters):
+            vertex_mask = np.zeros(fineGraphBase.n_vertices, dtype=bool)
+            vertex_mask[best[1]] = True
+            for _ in range(0, self.tube_rings):
+                vertex_mask[edges[vertex_mask[edges].any(axis=1)]] = True
+
+            tube, sub_to_full = tube_graph(fineGraphBase, vertex_mask)
+            full_to_sub = np.full(fineGraphBase.n_vertices, -1, dtype=np.int64)
+            full_to_sub[sub_to_full] = np.arange(len(sub_to_full))
+
+            candidate = self.shortest_odd_loop(tube, full_to_sub[best[1]], check_words)
+            if candidate is None or candidate[0] >= best[0] - 1e-12:
+                break
+            best = (candidate[0], sub_to_full[candidate[1]].tolist())
+
+        dim_h1 = fineGraphBase.annotation_null_vector.shape[0]
+        return (best[0], best[1], unpack_z2_vector(self.path_word(fineGraphBase, best[1]), dim_h1))
+
+    def shortest_odd_loop(self, tube: GraphBase, loop: np.ndarray, check_words: np.ndarray):
+        """Shortest fundamental loop whose annotation has odd parity with check_words,
+        over SPTs at a loop vertex & then at the tube vertex farthest from all sources so far
+        (at most tube_sources). Loops with tails are cut at their LCA.
+        Returns (length, path) or None"""
+        edges = np.asarray(tube.edges)
+        cover_dists = np.full(tube.n_vertices, np.inf)
+        best = None
+        v = int(loop[0])
+        for _ in range(0, self.tube_sources):
+            sp_tree = SpanningTree(tube)
+            sp_tree.build_spt_delta(v, True)
+
+            edge_ids = sp_tree.residual_edge_ids
+            vs, vd = edges[edge_ids, 0], edges[edge_ids, 1]
+            lengths = sp_tree.dists[vs] + sp_tree.dists[vd] + tube.edge_lengths[edge_ids]
+            annotation_words = sp_tree.vertex_annotation_words[vs] ^ \
+                sp_tree.vertex_annotation_words[vd] ^ tube.edge_annotation_words[edge_ids]
+            odd = odd_z2_rows(annotation_words & check_words)
+
+            if odd.any():
+                idx = np.flatnonzero(odd)[np.argmin(lengths[odd])]
+                if best is None or lengths[idx] < best[0]:
+                    path = sp_tree.get_path(int(vs[idx]), int(vd[idx])) + [int(vs[idx])]
+                    path_edges = tube.edge_index(path[:-1], path[1:])
+                    best = (float(np.sum(tube.edge_lengths[path_edges])), np.array(path))
+
+            np.minimum(cover_dists, sp_tree.dists, out=cover_dists)
+            v = int(np.argmax(cover_dists))
+            if cover_dists[v] == 0:
+                break
+
+        return best
@@ -0,0 +1,100 @@
+"""
+Batch rendering of cycle images
+
+One off-screen plotter per process holds the base surface actor, only the loop
+actor is swapped between screenshots. Loop polydata holds the loop vertices only.
+"""
+
+import multiprocessing
+import pyvista as pv
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+BASE_STYLE = {'color': 'tan', 'opacity': 0.5, 'style': 'surface', 'show_edges': True}
+LOOP_STYLE = {'color': 'red', 'line_width': 3.0}
+
+def mesh_to_vis_polydata(points: np.ndarray, fv_indices: np.ndarray):
+    """Triangle mesh as pyvista PolyData"""
+    fv_indices = np.asarray(fv_indices)
+    faces = np.empty((len(fv_indices), 4), dtype=np.int64)
+    faces[:, 0] = 3
+    faces[:, 1:4] = fv_indices
+    return pv.PolyData(np.asarray(points), faces.reshape(-1))
+
+def lines_to_vis_polydata(points: np.ndarray, edges: list):
+    """edges: [(vs, vd), ...], the polydata references the edge vertices only"""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    vertices, local_edges = np.unique(edges, return_inverse=True)
+
+    lines = np.empty((len(edges), 3), dtype=np.int64)
+    lines[:, 0] = 2
+    lines[:, 1:3] = local_edges.reshape(-1, 2)
+
+    poly = pv.PolyData(np.asarray(points)[vertices])
+    poly.lines = lines.reshape(-1)
+    return poly
+
+def path_to_vis_polydata(points: np.ndarray, path: list):
+    """Vertex path as one polyline over its own vertices"""
+    path = np.asarray(path, dtype=np.int64)
+    poly = pv.PolyData(np.asarray(points)[path])
+    poly.lines = np.concatenate([[len(path)], np.arange(len(path))])
+    return poly
+
+def combine_plot(*args):
+    """Interactive plot of (polydata, add_mesh options) pairs"""
+    assert(len(args) >= 1)
+    p = pv.Plotter()
+    for poly, style in args:
+        p.add_mesh(poly, **style)
+    p.show()
+
+class BatchRenderer:
+    """Off-screen plotter with a fixed base surface, renders one loop per image"""
+    def __init__(self, points: np.ndarray, fv_indices: np.ndarray, window_size=(1920, 1080),
+                 base_style: dict = None, loop_style: dict = None):
+        self.points = np.asarray(points)
+        self.loop_style = LOOP_STYLE if loop_style is None else loop_style
+        self.plotter = pv.Plotter(off_screen=True, window_size=list(window_size))
+        self.plotter.add_mesh(mesh_to_vis_polydata(points, fv_indices), **(BASE_STYLE if base_style is None else base_style))
+        self.loop_actor = None
+
+    def render(self, filename: str, path: list):
+        """Screenshot of the base surface with the loop along path"""
+        if self.loop_actor is not None:
+            self.plotter.remove_actor(self.loop_actor, render=False)
+        self.loop_actor = self.plotter.add_mesh(path_to_vis_polydata(self.points, path), **self.loop_style)
+        self.plotter.screenshot(filename)
+
+    def close(self):
+        self.plotter.close()
+
+# Renderer of a pool worker process
+_renderer = None
+
+def _init_worker(points, fv_indices, options):
+    global _renderer
+    _renderer = BatchRenderer(points, fv_indices, **options)
+
+def _render(job):
+    _renderer.render(*job)
+    return job[0]
+
+def render_cycles(points: np.ndarray, fv_indices: np.ndarray, jobs: list, n_workers: int = 1, **options):
+    """Renders [(filename, path)], scene setup once per worker process
+    options: BatchRenderer keyword arguments"""
+    n_workers = min(n_workers, len(jobs))
+    if n_workers > 1:
+        with multiprocessing.Pool(n_workers, initializer=_init_worker, initargs=(points, fv_indices, options)) as pool:
+            for filename in pool.imap_unordered(_render, jobs):
+                logger.info(f"Rendered {filename}")
+    elif n_workers == 1:
+        renderer = BatchRenderer(points, fv_indices, **options)
+        try:
+            for filename, path in jobs:
+                renderer.render(filename, path)
+                logger.info(f"Rendered {filename}")
+        finally:
+            renderer.close()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+
+"""
+Resident handle loop service
+
+An asyncio server on a unix socket (address is a path) or localhost TCP (address
+is host:port). The basis computation runs on a pool of worker processes, which
+stay alive between requests and keep the annotated component graphs of recent
+meshes; finished results are kept by the server. Concurrency is bounded by the
+number of workers, identical requests in flight share one computation.
+
+Each message is a 4-byte big-endian header size, a JSON header and an optional
+binary payload of header['payload_size'] bytes.
+
+Request header:
+    {'op': 'basis', 'path': mesh path readable by the service}
+    {'op': 'basis', 'format': 'obj' | 'off' | 'ply' | 'stl' | 'npz', 'payload_size': n}
+        npz payloads hold 'points' & 'fv_indices' arrays, others are mesh files
+    optional 'annotation', 'reorder', 'optimizer_options' as in compute_component_bases
+    {'op': 'ping'}, {'op': 'stats'}
+Response header: {'status': 'ok' | 'error', ...}, basis results come with an npz
+payload of component_ids, lengths, path_offsets & path_vertices (see unpack_cycles)
+
+python -m mesh_cut.handle_loop.service serve address [n_workers]
+python -m mesh_cut.handle_loop.service query address mesh_path
+"""
+
+from mesh_cut.handle_loop.components import closed_components, annotated_component_graph, component_cycles
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+import multiprocessing
+import openmesh as om
+import numpy as np
+import threading
+import tempfile
+import asyncio
+import hashlib
+import logging
+import socket
+import struct
+import json
+import time
+import sys
+import io
+import os
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = struct.Struct('>I')
+MESH_FORMATS = ('obj', 'off', 'ply', 'stl', 'npz')
+
+def parse_address(address: str):
+    """host:port for TCP, otherwise a unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep != '' and port.isdigit() and '/' not in address:
+        return (host, int(port))
+    return address
+
+def pack_message(header: dict, payload: bytes = b''):
+    header = dict(header, payload_size=len(payload))
+    encoded = json.dumps(header).encode()
+    return HEADER_SIZE.pack(len(encoded)) + encoded + payload
+
+def pack_cycles(cycles):
+    """[(component_id, cycle_length, path, ...)] -> npz bytes of flat arrays"""
+    paths = [np.asarray(cycle[2], dtype=np.int64) for cycle in cycles]
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        component_ids=np.array([cycle[0] for cycle in cycles], dtype=np.int64),
+        lengths=np.array([cycle[1] for cycle in cycles], dtype=np.float64),
+        path_offsets=np.cumsum([0] + [len(path) for path in paths], dtype=np.int64),
+        path_vertices=np.concatenate(paths) if len(paths) > 0 else np.zeros(0, dtype=np.int64)
+    )
+    return buffer.getvalue()
+
+def unpack_cycles(payload: bytes):
+    """npz bytes -> [(component_id, cycle_length, path)], like compute_component_bases
+    without the annotations"""
+    arrays = np.load(io.BytesIO(payload))
+    offsets, vertices = arrays['path_offsets'], arrays['path_vertices']
+    return [
+        (int(component_id), float(length), vertices[offsets[i]:offsets[i + 1]].tolist())
+        for i, (component_id, length) in enumerate(zip(arrays['component_ids'], arrays['lengths']))
+    ]
+
+# Worker process state, (mesh_key, annotation, reorder) -> [(component_id, vertex_ids, graphBase)]
+_graph_cache = None
+_graph_cache_size = 0
+
+def _init_worker(graph_cache_size: int):
+    """Runs once per worker process, imports are warm after this"""
+    global _graph_cache, _graph_cache_size
+    _graph_cache = OrderedDict()
+    _graph_cache_size = graph_cache_size
+    om.TriMesh()
+    logger.info(f"Worker {os.getpid()} ready")
+
+def _load_mesh(path: str, data: bytes, mesh_format: str):
+    """Returns (points, fv_indices)"""
+    if mesh_format == 'npz':
+        arrays = np.load(path if path is not None else io.BytesIO(data))
+        return arrays['points'], arrays['fv_indices']
+    if path is None:
+        # openmesh only reads files
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"mesh.{mesh_format}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            mesh = om.read_trimesh(path)
+    else:
+        mesh = om.read_trimesh(path)
+    if mesh.n_faces() == 0:
+        raise Exception(f"No faces read from the {mesh_format} mesh")
+    return mesh.points(), mesh.fv_indices()
+
+def _solve(mesh_key: str, path: str, data: bytes, mesh_format: str,
+           annotation: str, reorder: str, optimizer_options: dict):
+    """Worker side of a basis request, returns (packed cycles, graph cache hit)"""
+    graph_key = (mesh_key, annotation, reorder)
+    components = _graph_cache.get(graph_key)
+    hit = components is not None
+    if hit:
+        _graph_cache.move_to_end(graph_key)
+    else:
+        points, fv_indices = _load_mesh(path, data, mesh_format)
+        components = [
+            (component_id, vertex_ids, annotated_component_graph(component_points, component_faces, annotation, reorder))
+            for component_id, vertex_ids, component_points, component_faces in closed_components(points, fv_indices)
+        ]
+        _graph_cache[graph_key] = components
+        while len(_graph_cache) > _graph_cache_size:
+            _graph_cache.popitem(last=False)
+
+    cycles = [
+        cycle
+        for component_id, vertex_ids, graphBase in components
+        for cycle in component_cycles(component_id, vertex_ids, graphBase, optimizer_options)
+    ]
+    cycles.sort(key=lambda cycle: (cycle[0], cycle[1]))
+    return pack_cycles(cycles), hit
+
+class HandleLoopService:
+    """asyncio front end of a warm worker pool"""
+    def __init__(self, address: str, n_workers: int = None, cache_size: int = 64, graph_cache_size: int = 8):
+        """
+        cache_size: finished results kept by the server
+        graph_cache_size: annotated meshes kept by each worker
+        """
+        self.address = parse_address(address)
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+        self.cache_size = cache_size
+        self.graph_cache_size = graph_cache_size
+
+        self.results = OrderedDict()
+        self.in_flight = {}
+        # result key -> executor future of the in flight computation
+        self.jobs = {}
+        self.stats = {'requests': 0, 'errors': 0, 'result_hits': 0, 'graph_hits': 0, 'computed': 0}
+        self.executor = None
+        self.loop = None
+        self.server = None
+
+    def request_key(self, header: dict, payload: bytes):
+        """Returns (mesh_key, result_key)"""
+        if header.get('path') is not None:
+            stat = os.stat(header['path'])
+            mesh_key = f"{os.path.realpath(header['path'])}:{stat.st_mtime_ns}:{stat.st_size}"
+        else:
+            mesh_key = hashlib.sha256(payload).hexdigest()
+        options = json.dumps(
+            [header.get('annotation'), header.get('reorder'), header.get('optimizer_options')], sort_keys=True
+        )
+        return mesh_key, f"{mesh_key}:{options}"
+
+    async def compute(self, header: dict, payload: bytes):
+        """Returns (packed cycles, info)"""
+        path = header.get('path')
+        mesh_format = header.get('format', os.path.splitext(path)[1][1:].lower() if path is not None else None)
+        if mesh_format not in MESH_FORMATS:
+            raise Exception(f"Unknown mesh format {mesh_format}")
+        annotation = header.get('annotation', 'tree_cotree')
+        if annotation not in ('tree_cotree', 'volumetric'):
+            raise Exception(f"Unknown annotation {annotation}")
+
+        mesh_key, result_key = self.request_key(header, payload)
+        if result_key in self.results:
+            self.results.move_to_end(result_key)
+            self.stats['result_hits'] += 1
+            return self.results[result_key], {'cached': 'result'}
+
+        shared = result_key in self.in_flight
+        if shared:
+            future = self.in_flight[result_key]
+        else:
+            job = self.executor.submit(
+                _solve, mesh_key, path, payload if path is None else None, mesh_format,
+                annotation, header.get('reorder'), header.get('optimizer_options') or {}
+            )
+            self.jobs[result_key] = job
+            future = asyncio.wrap_future(job, loop=self.loop)
+            future.add_done_callback(lambda future: self.finish(result_key, future))
+            self.in_flight[result_key] = future
+        packed, graph_hit = await asyncio.shield(future)
+        if shared:
+            return packed, {'cached': 'in_flight'}
+        return packed, {'cached': 'graph' if graph_hit else None}
+
+    def finish(self, result_key: str, future: asyncio.Future):
+        """Keeps the result of a finished computation, also when its client left"""
+        self.in_flight.pop(result_key, None)
+        self.jobs.pop(result_key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        packed, graph_hit = future.result()
+        self.stats['computed'] += 1
+        self.stats['graph_hits'] += int(graph_hit)
+        self.results[result_key] = packed
+        while len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+
+    async def respond(self, header: dict, payload: bytes):
+        """Returns (header, payload) of the response"""
+        op = header.get('op')
+        if op == 'ping':
+            return {'status': 'ok'}, b''
+        if op == 'stats':
+            return dict(self.stats, status='ok', n_workers=self.n_workers, results=len(self.results)), b''
+        if op != 'basis':
+            raise Exception(f"Unknown op {op}")
+
+        start_time = time.perf_counter()
+        packed, info = await self.compute(header, payload)
+        return dict(info, status='ok', elapsed=time.perf_counter() - start_time), packed
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One client connection, requests are answered in order"""
+        try:
+            while True:
+                try:
+                    size = HEADER_SIZE.unpack(await reader.readexactly(HEADER_SIZE.size))[0]
+                except asyncio.IncompleteReadError:
+                    break
+                header = json.loads(await reader.readexactly(size))
+                payload = await reader.readexactly(header.get('payload_size', 0))
+
+                self.stats['requests'] += 1
+                try:
+                    response, response_payload = await self.respond(header, payload)
+                except Exception as e:
+                    logger.warning(f"Request failed: {e!r}")
+                    self.stats['errors'] += 1
+                    response, response_payload = {'status': 'error', 'message': repr(e)}, b''
+                writer.write(pack_message(response, response_payload))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Connection lost: {e!r}")
+        finally:
+            writer.close()
+
+    async def serve(self, ready: threading.Event = None):
+        """Serve until stop() is called"""
+        self.loop = asyncio.get_running_loop()
+        # spawned workers, the server may run on a thread of a larger process
+        self.executor = ProcessPoolExecutor(
+            self.n_workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(self.graph_cache_size,)
+        )
+        # start & warm all workers before accepting requests
+        await asyncio.gather(*[self.loop.run_in_executor(self.executor, os.getpid) for _ in range(0, self.n_workers)])
+
+        if isinstance(self.address, tuple):
+            self.server = await asyncio.start_server(self.handle, *self.address)
+            self.address = self.server.sockets[0].getsockname()[:2]
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, self.address)
+        logger.info(f"Serving on {self.address} with {self.n_workers} workers")
+        if ready is not None:
+            ready.set()
+
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # shutdown(cancel_futures=True) needs python 3.9
+            for job in self.jobs.values():
+                job.cancel()
+            self.executor.shutdown(wait=True)
+            if not isinstance(self.address, tuple) and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def stop(self):
+        """Thread safe"""
+        self.loop.call_soon_threadsafe(self.server.close)
+
+class ServiceClient:
+    """Blocking client of HandleLoopService, one connection"""
+    def __init__(self, address, timeout: float = None):
+        address = parse_address(address) if isinstance(address, str) else address
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address, timeout=timeout)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+
+    def recv_exactly(self, size: int):
+        chunks = []
+        while size > 0:
+            chunk = self.sock.recv(min(size, 1 << 20))
+            if len(chunk) == 0:
+                raise ConnectionError("Service closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def request(self, header: dict, payload: bytes = b''):
+        """Returns (header, payload) of the response"""
+        self.sock.sendall(pack_message(header, payload))
+        size = HEADER_SIZE.unpack(self.recv_exactly(HEADER_SIZE.size))[0]
+        response = json.loads(self.recv_exactly(size))
+        response_payload = self.recv_exactly(response.get('payload_size', 0))
+        if response['status'] != 'ok':
+            raise Exception(f"Service error: {response['message']}")
+        return response, response_payload
+
+    def basis(self, path: str = None, data: bytes = None, mesh_format: str = None,
+              points: np.ndarray = None, fv_indices: np.ndarray = None, **options):
+        """Optimal basis of a mesh given by a path on the service side, file bytes & format,
+        or points & fv_indices; options: annotation, reorder, optimizer_options
+        Returns [(component_id, cycle_length, path)]"""
+        header = dict(options, op='basis')
+        if path is not None:
+            header['path'] = path
+            data = b''
+        elif points is not None:
+            buffer = io.BytesIO()
+            np.savez(buffer, points=np.asarray(points, dtype=np.float64), fv_indices=np.asarray(fv_indices, dtype=np.int64))
+            header['format'], data = 'npz', buffer.getvalue()
+        else:
+            header['format'] = mesh_format
+        _, payload = self.request(header, data)
+        return unpack_cycles(payload)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def main(options):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)40s - %(levelname)s - %(message)s')
+
+    if len(options) in (2, 3) and options[0] == 'serve':
+        service = HandleLoopService(options[1], int(options[2]) if len(options) == 3 else None)
+        asyncio.run(service.serve())
+    elif len(options) == 3 and options[0] == 'query':
+        with ServiceClient(options[1]) as client:
+            for component_id, cycle_length, path in client.basis(path=os.path.abspath(options[2])):
+                print(f"{component_id} {cycle_length:.6f} {' '.join(map(str, path))}")
+    else:
+        print(f"Options: serve address [n_workers]")
+        print(f"         query address mesh_path")
+        print(f"address: unix socket path or host:port")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
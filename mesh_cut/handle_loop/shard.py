@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""
+Sharded all-sources sweep
+
+A coordinator hands out source ranges to workers over a multiprocessing.connection
+socket. Workers load the GraphBase cache and its annotation (save_cache &
+save_annotation into the same directory), sweep their ranges and send back
+the per-class minimum candidates. The coordinator merges them and runs the
+final independence selection.
+
+python -m mesh_cut.handle_loop.shard coordinator cache_dir host port n_local_workers
+python -m mesh_cut.handle_loop.shard worker host port authkey_hex
+"""
+
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.candidates import CandidatePool
+from mesh_cut.handle_loop.graphbase import GraphBase
+from multiprocessing.connection import Listener, Client
+import multiprocessing
+import threading
+import logging
+import queue
+import time
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+def run_worker(address: tuple, authkey: bytes):
+    """Serve source ranges of one coordinator until it says stop"""
+    conn = Client(address, authkey=authkey)
+    try:
+        _, cache_path, fingerprint, options = conn.recv()
+        graphBase = GraphBase.from_cache(cache_path)
+        graphBase.load_annotation(cache_path)
+        if graphBase.fingerprint() != fingerprint:
+            conn.send(('error', f"{cache_path} does not match the coordinator's mesh or annotation"))
+            return
+
+        optimizer = HomologyBasisOptimizer(graphBase, **options)
+        conn.send(('ready', os.getpid()))
+
+        while True:
+            message = conn.recv()
+            if message[0] == 'stop':
+                break
+
+            _, start, end = message
+            with CandidatePool(optimizer.spill_threshold) as pool:
+                # offers per source < n_edges, keeps ties in the order of a sequential sweep
+                pool.seq = start * graphBase.n_edges
+                optimizer.sweep_range(pool, start, end)
+                conn.send(('result', start, end, pool.get_state()))
+    finally:
+        conn.close()
+
+class ShardCoordinator:
+    """Hands out source ranges of graphBase to workers and merges their candidates"""
+    def __init__(self, graphBase: GraphBase, cache_path: str, chunk_size: int = None,
+                 address: tuple = ('localhost', 0), authkey: bytes = None, options: dict = None):
+        """
+        cache_path: directory with the cache & annotation of graphBase, as seen by workers
+        options: HomologyBasisOptimizer keyword arguments for workers
+        """
+        self.graphBase = graphBase
+        self.cache_path = cache_path
+        self.fingerprint = graphBase.fingerprint()
+        self.options = {} if options is None else options
+        self.chunk_size = chunk_size if chunk_size is not None else max(1, graphBase.n_vertices // 64)
+        self.authkey = authkey if authkey is not None else os.urandom(16)
+
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+
+        self.ranges = queue.Queue()
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.pool = None
+        self.n_pending = 0
+        self.n_workers = 0
+        self.errors = []
+
+    def serve(self, conn):
+        """Talk to one worker, ranges of a lost worker are queued again"""
+        current = None
+        try:
+            conn.send(('job', self.cache_path, self.fingerprint, self.options))
+            message = conn.recv()
+            if message[0] == 'error':
+                raise Exception(message[1])
+            logger.info(f"Worker {message[1]} joined")
+
+            while True:
+                try:
+                    current = self.ranges.get(timeout=0.1)
+                except queue.Empty:
+                    if self.finished.is_set():
+                        conn.send(('stop',))
+                        return
+                    continue
+
+                conn.send(('range', *current))
+                _, start, end, state = conn.recv()
+                assert((start, end) == current)
+                with self.lock:
+                    self.pool.merge_entries(state['entries'])
+                    self.pool.n_offered += state['n_offered']
+                    self.pool.n_null += state['n_null']
+                    self.n_pending -= 1
+                    if self.n_pending == 0:
+                        self.finished.set()
+                current = None
+        except (EOFError, OSError) as e:
+            logger.warning(f"Worker lost: {e}")
+        except Exception as e:
+            logger.error(f"Worker failed: {e}")
+            with self.lock:
+                self.errors.append(e)
+        finally:
+            if current is not None:
+                self.ranges.put(current)
+            with self.lock:
+                self.n_workers -= 1
+            conn.close()
+
+    def accept(self):
+        while not self.finished.is_set():
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                # listener closed
+                return
+            with self.lock:
+                self.n_workers += 1
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    def run(self, n_local_workers: int = 0, timeout: float = None):
+        """Sweep all sources, returns the optimal basis like compute_optimal_basis
+        n_local_workers: worker processes started on this node"""
+        n_vertices = self.graphBase.n_vertices
+        self.pool = CandidatePool()
+        for start in range(0, n_vertices, self.chunk_size):
+            self.ranges.put((start, min(start + self.chunk_size, n_vertices)))
+            self.n_pending += 1
+
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+            for _ in range(0, n_local_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        threading.Thread(target=self.accept, daemon=True).start()
+
+        start_time = time.perf_counter()
+        try:
+            while not self.finished.wait(0.1):
+                if len(self.errors) > 0:
+                    raise self.errors[0]
+                if timeout is not None and time.perf_counter() - start_time > timeout:
+                    raise Exception(f"Sharded sweep timed out, {self.n_pending} ranges left")
+                if len(workers) > 0 and not any(worker.is_alive() for worker in workers) \
+                        and self.n_workers == 0:
+                    raise Exception("All local workers exited")
+        finally:
+            self.finished.set()
+            self.listener.close()
+            for worker in workers:
+                worker.join(timeout=5)
+
+        cycles = self.pool.cycles()
+        logger.info(f"Number of candidate cycles: {self.pool.n_offered}, "
+                    f"null-homologous: {self.pool.n_null}, classes kept: {len(cycles)}")
+        assert(len(cycles) != 0)
+
+        return HomologyBasisOptimizer(self.graphBase).select_basis(cycles)
+
+def main(options):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)40s - %(levelname)s - %(message)s')
+
+    if len(options) == 5 and options[0] == 'coordinator':
+        cache_path, host, port, n_local_workers = options[1], options[2], int(options[3]), int(options[4])
+        graphBase = GraphBase.from_cache(cache_path)
+        graphBase.load_annotation(cache_path)
+
+        coordinator = ShardCoordinator(graphBase, cache_path, address=(host, port))
+        logger.info(f"Listening on {coordinator.address}, authkey {coordinator.authkey.hex()}")
+        cycles = coordinator.run(n_local_workers)
+        for cycle in cycles:
+            print(f"{cycle[0]:.6f} {' '.join(map(str, cycle[1]))}")
+    elif len(options) == 4 and options[0] == 'worker':
+        run_worker((options[1], int(options[2])), bytes.fromhex(options[3]))
+    else:
+        print(f"Options: coordinator cache_dir host port n_local_workers")
+        print(f"         worker host port authkey_hex")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,4 +1,4 @@
-from .linalg import check_z2
+from .linalg import check_z2, pack_z2_rows
 from .graphbase import GraphBase
 from .heapdict import heapdict
 import numpy as np
@@ -20,16 +20,37 @@ class SpanningTree:
         # edges that weren't chosen for the spanning tree
         self.residual_edges = None
 
+        # Array form
+        # vertex -> parent vertex (-1 for root)
+        self.parent = None
+        # (n_edges,) True for tree edges
+        self.tree_edge_mask = None
+        # ids of edges not in tree
+        self.residual_edge_ids = None
+
         # Only available in SPT
         self.dists = None
+        # vertex -> edge index to parent (-1 for root)
+        self.parent_edge = None
+
+        # number of edges examined while building SPT
+        self.n_relaxations = 0
 
         # vertice annotation
         self.vertice_annotation = None
+        # (n_vertices, ceil(dim / 64)) packed vertice annotation
+        self.vertex_annotation_words = None
 
     def get_residual_edges(self):
         if self.residual_edges is not None:
             return self.residual_edges
 
+        if self.residual_edge_ids is not None:
+            self.residual_edges = list(map(
+                tuple, np.asarray(self.graphBase.edges)[self.residual_edge_ids].tolist()
+            ))
+            return self.residual_edges
+
         assert(len(self.edge_set) > 0)
         self.residual_edges = list(self.graphBase.edge_set - self.edge_set)
 
@@ -73,6 +94,88 @@ class SpanningTree:
         return spath + [last_passage] + epath[::-1]
 
     def build_mst(self, start: int = 0):
+        """ Build MST using Kruskal over the edge arrays, rooted at start """
+        if self.parent_tree is not None:
+            raise Exception("Tree already built.")
+
+        n_vertices = self.graphBase.n_vertices
+        edges = np.asarray(self.graphBase.edges)
+        order = np.argsort(self.graphBase.edge_lengths, kind='stable')
+
+        # union-find with union by rank & path halving
+        # (lists, as element access on ndarrays is slower in the interpreter)
+        uf_parent = list(range(0, n_vertices))
+        uf_rank = [0] * n_vertices
+        tree_edge_ids = []
+
+        for e_idx, vs, vd in zip(order.tolist(), edges[order, 0].tolist(), edges[order, 1].tolist()):
+            while uf_parent[vs] != vs:
+                uf_parent[vs] = uf_parent[uf_parent[vs]]
+                vs = uf_parent[vs]
+            while uf_parent[vd] != vd:
+                uf_parent[vd] = uf_parent[uf_parent[vd]]
+                vd = uf_parent[vd]
+
+            if vs == vd:
+                continue
+
+            if uf_rank[vs] < uf_rank[vd]:
+                vs, vd = vd, vs
+            uf_parent[vd] = vs
+            if uf_rank[vs] == uf_rank[vd]:
+                uf_rank[vs] += 1
+
+            tree_edge_ids.append(e_idx)
+            if len(tree_edge_ids) == n_vertices - 1:
+                break
+
+        if len(tree_edge_ids) != n_vertices - 1:
+            raise Exception("Mesh not connected.")
+
+        self.tree_edge_mask = np.zeros(self.graphBase.n_edges, dtype=bool)
+        self.tree_edge_mask[tree_edge_ids] = True
+        self.residual_edge_ids = np.flatnonzero(~self.tree_edge_mask)
+
+        self.root_tree(start)
+
+    def root_tree(self, start: int):
+        """Orient tree edges (tree_edge_mask) towards start,
+        fills parent, parent_tree & edge_set"""
+        n_vertices = self.graphBase.n_vertices
+        tree_edges = np.asarray(self.graphBase.edges)[self.tree_edge_mask]
+        tree_lengths = np.asarray(self.graphBase.edge_lengths)[self.tree_edge_mask]
+
+        # CSR adjacency of the tree
+        ends = np.concatenate((tree_edges[:, 0], tree_edges[:, 1]))
+        neighs = np.concatenate((tree_edges[:, 1], tree_edges[:, 0]))
+        dists = np.concatenate((tree_lengths, tree_lengths))
+        order = np.argsort(ends, kind='stable')
+        offsets = np.zeros(n_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=n_vertices), out=offsets[1:])
+        neighs = neighs[order].tolist()
+        dists = dists[order].tolist()
+        offsets = offsets.tolist()
+
+        parent = [-1] * n_vertices
+        self.parent_tree = {}
+        self.root_id = start
+
+        visited = [False] * n_vertices
+        visited[start] = True
+        queue = [start]
+        for vs in queue:
+            for i in range(offsets[vs], offsets[vs + 1]):
+                vd = neighs[i]
+                if not visited[vd]:
+                    visited[vd] = True
+                    parent[vd] = vs
+                    self.parent_tree[vd] = (vs, dists[i])
+                    queue.append(vd)
+
+        self.parent = np.array(parent, dtype=np.int64)
+        self.edge_set = set(map(tuple, tree_edges.tolist()))
+
+    def build_mst_prim(self, start: int = 0):
         """ Build MST using Prim """
         if self.parent_tree is not None:
             raise Exception("Tree already built.")
@@ -108,15 +211,19 @@ class SpanningTree:
         if len(self.edge_set) != self.graphBase.n_vertices - 1:
             raise Exception("Mesh not connected.")
 
-    def build_spt(self, start: int, annotate=True):
-        """Build shortest path tree start from @start, uses Dijkstra"""
+    def build_spt(self, start: int, annotate=True, level_order=False):
+        """Build shortest path tree start from @start, uses Dijkstra
+        level_order: Dijkstra builds dist & parent only, vertex_annotation_words are then
+            filled level by level over the final tree (vertice_annotation is not filled)"""
         if self.parent_tree is not None:
             raise Exception("Tree already built.")
 
         work_heap = heapdict()
         self.parent_tree = {}
         self.root_id = start
-        
+
+        annotate_level_order = annotate and level_order
+        annotate = annotate and not level_order
         if annotate:
             assert(self.graphBase.annotation_null_vector is not None)
             self.vertice_annotation = {}
@@ -127,10 +234,13 @@ class SpanningTree:
             work_heap[i] = float('inf')
 
         self.dists[start] = 0
+        work_heap[start] = 0
 
         while len(work_heap) > 0:
             vd, _ = work_heap.popitem()
-            for (vd_neigh, (_, neigh_dist)) in self.graphBase._v_pool.get(vd).edges.items():
+            vd_edges = self.graphBase._v_pool.get(vd).edges
+            self.n_relaxations += len(vd_edges)
+            for (vd_neigh, (_, neigh_dist)) in vd_edges.items():
                 alt = self.dists[vd] + neigh_dist
                 if alt < self.dists[vd_neigh]:
                     self.dists[vd_neigh] = alt
@@ -144,3 +254,293 @@ class SpanningTree:
         self.edge_set = set(
             [tuple(sorted((k, v))) for k, (v, _) in self.parent_tree.items()]
         )
+
+        # array form
+        self.dists = np.array(self.dists)
+        children = np.fromiter(self.parent_tree.keys(), dtype=np.int64, count=len(self.parent_tree))
+        parents = np.fromiter(
+            (v for v, _ in self.parent_tree.values()), dtype=np.int64, count=len(self.parent_tree)
+        )
+        parent = np.full(self.graphBase.n_vertices, -1, dtype=np.int64)
+        parent[children] = parents
+        self.set_parent_array(parent)
+
+        if annotate:
+            self.vertex_annotation_words = pack_z2_rows(np.stack(
+                [self.vertice_annotation[v] for v in range(0, self.graphBase.n_vertices)]
+            ))
+        elif annotate_level_order:
+            self.annotate_by_level()
+
+    def set_parent_array(self, parent: np.ndarray):
+        """Fills parent, parent_edge, tree_edge_mask & residual_edge_ids"""
+        self.parent = parent
+        children = np.flatnonzero(parent >= 0)
+        self.parent_edge = np.full(self.graphBase.n_vertices, -1, dtype=np.int64)
+        self.parent_edge[children] = self.graphBase.edge_index(children, parent[children])
+
+        self.tree_edge_mask = np.zeros(self.graphBase.n_edges, dtype=bool)
+        self.tree_edge_mask[self.parent_edge[children]] = True
+        self.residual_edge_ids = np.flatnonzero(~self.tree_edge_mask)
+
+    def set_parent_tree(self):
+        """Fills parent_tree & edge_set from the array form"""
+        children = np.flatnonzero(self.parent >= 0)
+        lengths = np.asarray(self.graphBase.edge_lengths)[self.parent_edge[children]]
+        self.parent_tree = dict(zip(
+            children.tolist(),
+            zip(self.parent[children].tolist(), lengths.tolist())
+        ))
+        self.edge_set = set(map(tuple, np.asarray(self.graphBase.edges)[self.tree_edge_mask].tolist()))
+
+    def annotate_from_parents(self):
+        """vertex_annotation_words by XOR-ing edge annotations along tree paths,
+        pointer jumping takes log(depth) vectorized rounds"""
+        edge_words = self.graphBase.edge_annotation_words
+        words = np.zeros((self.graphBase.n_vertices, edge_words.shape[1]), dtype=edge_words.dtype)
+        children = self.parent >= 0
+        words[children] = edge_words[self.parent_edge[children]]
+
+        # words[v]: path from v up to ancestor[v]
+        ancestor = self.parent.copy()
+        pending = np.flatnonzero(ancestor >= 0)
+        while len(pending) > 0:
+            words[pending] ^= words[ancestor[pending]]
+            ancestor[pending] = ancestor[ancestor[pending]]
+            pending = pending[ancestor[pending] >= 0]
+
+        self.vertex_annotation_words = words
+
+    def annotate_by_level(self):
+        """vertex_annotation_words over the final tree in BFS order from root,
+        one vectorized XOR of parent words & edge words per level"""
+        n_vertices = self.graphBase.n_vertices
+        edge_words = self.graphBase.edge_annotation_words
+        words = np.zeros((n_vertices, edge_words.shape[1]), dtype=edge_words.dtype)
+
+        # children of each vertex, CSR
+        children = np.flatnonzero(self.parent >= 0)
+        children = children[np.argsort(self.parent[children], kind='stable')]
+        n_children = np.bincount(self.parent[children], minlength=n_vertices)
+        offsets = np.zeros(n_vertices + 1, dtype=np.int64)
+        np.cumsum(n_children, out=offsets[1:])
+
+        level = np.array([self.root_id], dtype=np.int64)
+        while len(level) > 0:
+            counts = n_children[level]
+            slots = np.repeat(offsets[level] - np.cumsum(counts) + counts, counts) + \
+                np.arange(counts.sum())
+            level = children[slots]
+            words[level] = words[self.parent[level]] ^ edge_words[self.parent_edge[level]]
+
+        self.vertex_annotation_words = words
+
+    def build_spt_delta(self, start: int, annotate=True, delta: float = None,
+                        vertex_mask: np.ndarray = None):
+        """Build shortest path tree start from @start, uses delta-stepping
+
+        Vertices are bucketed by dist / delta; all vertices of the current bucket are
+        relaxed at once until the bucket is stable. Same dists as build_spt, parents
+        may differ on ties. vertice_annotation (dict) is not filled.
+        vertex_mask: only span these vertices, the others keep dist inf & parent -1
+        """
+        if self.parent_tree is not None:
+            raise Exception("Tree already built.")
+        if annotate:
+            assert(self.graphBase.edge_annotation_words is not None)
+
+        n_vertices = self.graphBase.n_vertices
+        offsets, neighbors, edge_ids = self.graphBase.csr_adjacency
+        lengths = np.asarray(self.graphBase.edge_lengths)[edge_ids]
+        degrees = np.diff(offsets)
+        if delta is None:
+            delta = float(np.mean(self.graphBase.edge_lengths))
+
+        self.root_id = start
+        dists = np.full(n_vertices, np.inf)
+        dists[start] = 0
+        parent = np.full(n_vertices, -1, dtype=np.int64)
+        parent_slot = np.full(n_vertices, -1, dtype=np.int64)
+        settled = np.zeros(n_vertices, dtype=bool)
+
+        while True:
+            open_dists = np.where(settled, np.inf, dists)
+            bucket_min = open_dists.min()
+            if bucket_min == np.inf:
+                break
+            bucket_end = (np.floor(bucket_min / delta) + 1) * delta
+
+            frontier = np.flatnonzero(open_dists < bucket_end)
+            in_bucket = frontier
+            while len(frontier) > 0:
+                # gather CSR slices of the frontier
+                counts = degrees[frontier]
+                slots = np.repeat(offsets[frontier] - np.cumsum(counts) + counts, counts) + \
+                    np.arange(counts.sum())
+                srcs = np.repeat(frontier, counts)
+                dsts = neighbors[slots]
+                alts = dists[srcs] + lengths[slots]
+                self.n_relaxations += len(slots)
+
+                improving = alts < dists[dsts]
+                if vertex_mask is not None:
+                    improving &= vertex_mask[dsts]
+                slots, srcs, dsts, alts = slots[improving], srcs[improving], dsts[improving], alts[improving]
+                np.minimum.at(dists, dsts, alts)
+                won = alts == dists[dsts]
+                parent[dsts[won]] = srcs[won]
+                parent_slot[dsts[won]] = slots[won]
+
+                # improved vertices still in the bucket are relaxed again
+                frontier = np.unique(dsts[won])
+                frontier = frontier[dists[frontier] < bucket_end]
+                in_bucket = np.union1d(in_bucket, frontier)
+
+            settled[in_bucket] = True
+
+        if vertex_mask is None and not settled.all():
+            raise Exception("Mesh not connected.")
+
+        self.dists = dists
+        self.parent = parent
+        children = np.flatnonzero(parent >= 0)
+        self.parent_edge = np.full(n_vertices, -1, dtype=np.int64)
+        self.parent_edge[children] = edge_ids[parent_slot[children]]
+        self.tree_edge_mask = np.zeros(self.graphBase.n_edges, dtype=bool)
+        self.tree_edge_mask[self.parent_edge[children]] = True
+        self.residual_edge_ids = np.flatnonzero(~self.tree_edge_mask)
+        self.set_parent_tree()
+
+        if annotate:
+            self.annotate_from_parents()
+
+    def get_subtree_mask(self, node_id: int):
+        """(n_vertices,) True for node_id and its descendants"""
+        assert(self.parent is not None)
+
+        mask = np.zeros(self.graphBase.n_vertices, dtype=bool)
+        mask[node_id] = True
+
+        # pointer jumping over ancestors; stop at node_id & root
+        ancestor = self.parent.copy()
+        ancestor[node_id] = node_id
+        ancestor[self.root_id] = self.root_id
+        while True:
+            mask |= mask[ancestor]
+            jumped = ancestor[ancestor]
+            if (jumped == ancestor).all():
+                return mask
+            ancestor = jumped
+
+    def build_spt_from(self, prev: 'SpanningTree', start: int, annotate=True):
+        """Build shortest path tree at @start by repairing SPT @prev of the same graph
+
+        The subtree of start in prev keeps its (shifted) distances, parents and
+        annotations: tree paths are shortest paths. Dijkstra then only runs on the
+        remaining vertices, seeded across the subtree boundary.
+        vertice_annotation (dict) is not filled, use vertex_annotation_words.
+        """
+        if self.parent_tree is not None:
+            raise Exception("Tree already built.")
+        assert(prev.parent is not None)
+        if annotate:
+            assert(prev.vertex_annotation_words is not None)
+
+        n_vertices = self.graphBase.n_vertices
+        self.root_id = start
+
+        settled = prev.get_subtree_mask(start)
+        dists = np.where(settled, prev.dists - prev.dists[start], np.inf)
+        parent = np.where(settled, prev.parent, -1)
+        parent[start] = -1
+
+        # seed outside vertices from edges leaving the subtree
+        edges = np.asarray(self.graphBase.edges)
+        lengths = np.asarray(self.graphBase.edge_lengths)
+        crossing = np.flatnonzero(settled[edges[:, 0]] != settled[edges[:, 1]])
+        inside = np.where(settled[edges[crossing, 0]], edges[crossing, 0], edges[crossing, 1])
+        outside = np.where(settled[edges[crossing, 0]], edges[crossing, 1], edges[crossing, 0])
+        seed_dists = dists[inside] + lengths[crossing]
+        self.n_relaxations = len(crossing)
+
+        order = np.lexsort((seed_dists, outside))
+        first = order[np.concatenate(([True], outside[order][1:] != outside[order][:-1]))] \
+            if len(order) > 0 else order
+        dists[outside[first]] = seed_dists[first]
+        parent[outside[first]] = inside[first]
+
+        dists = dists.tolist()
+        parent = parent.tolist()
+        is_settled = settled.tolist()
+
+        work_heap = heapdict()
+        for v in outside[first].tolist():
+            work_heap[v] = dists[v]
+
+        pop_order = []
+        while len(work_heap) > 0:
+            vd, _ = work_heap.popitem()
+            is_settled[vd] = True
+            pop_order.append(vd)
+
+            vd_edges = self.graphBase._v_pool.get(vd).edges
+            self.n_relaxations += len(vd_edges)
+            for (vd_neigh, (_, neigh_dist)) in vd_edges.items():
+                if is_settled[vd_neigh]:
+                    continue
+                alt = dists[vd] + neigh_dist
+                if alt < dists[vd_neigh]:
+                    dists[vd_neigh] = alt
+                    parent[vd_neigh] = vd
+                    work_heap[vd_neigh] = alt
+
+        if len(pop_order) + np.count_nonzero(settled) != n_vertices:
+            raise Exception("Mesh not connected.")
+
+        self.dists = np.array(dists)
+        self.set_parent_array(np.array(parent, dtype=np.int64))
+        self.set_parent_tree()
+
+        if annotate:
+            # subtree annotations re-based at start, others follow pop order
+            words = prev.vertex_annotation_words ^ prev.vertex_annotation_words[start]
+            edge_words = self.graphBase.edge_annotation_words
+            for vd in pop_order:
+                words[vd] = words[parent[vd]] ^ edge_words[self.parent_edge[vd]]
+            self.vertex_annotation_words = words
+
+    def get_preorder(self):
+        """Vertices in DFS preorder from root, consecutive vertices are close in tree"""
+        assert(self.parent is not None)
+
+        children = np.flatnonzero(self.parent >= 0)
+        order = np.argsort(self.parent[children], kind='stable')
+        offsets = np.zeros(self.graphBase.n_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.parent[children], minlength=self.graphBase.n_vertices), out=offsets[1:])
+        children = children[order].tolist()
+        offsets = offsets.tolist()
+
+        preorder = []
+        stack = [self.root_id]
+        while len(stack) > 0:
+            vs = stack.pop()
+            preorder.append(vs)
+            stack.extend(reversed(children[offsets[vs]:offsets[vs + 1]]))
+
+        return preorder
+
+    def get_root_branch(self):
+        """vertex -> child of root whose subtree contains it (root -> root)"""
+        assert(self.parent is not None)
+
+        branch = self.parent.copy()
+        branch[self.root_id] = self.root_id
+        at_root = branch == self.root_id
+        branch[at_root] = np.flatnonzero(at_root)
+
+        # pointer jumping until every vertex points to its root child
+        while True:
+            jumped = branch[branch]
+            if (jumped == branch).all():
+                return branch
+            branch = jumped
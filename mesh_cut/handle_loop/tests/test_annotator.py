@@ -3,7 +3,7 @@ from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer, OptimizedH
 from mesh_cut.handle_loop.sp_tree import SpanningTree
 from mesh_cut.handle_loop.graphbase import *
 from mesh_cut.handle_loop.annotator import Annotator
-from mesh_cut.handle_loop.main import offscreen_combine_plot, combine_plot, om_to_vis_polydata, lines_to_vis_polydata
+from mesh_cut.handle_loop.render import combine_plot, mesh_to_vis_polydata, lines_to_vis_polydata
 import unittest
 import openmesh as om
 import sys
@@ -47,7 +47,7 @@ class AnnotatorTest(unittest.TestCase):
 
         print(h1_vec)
 
-        base_data = om_to_vis_polydata(self.meshes['genus1'])
+        base_data = mesh_to_vis_polydata(self.meshes['genus1'].points(), self.meshes['genus1'].fv_indices())
         edge_data = lines_to_vis_polydata(
             voluGraphBase._points,
             voluGraphBase.edge_list_from_vector(h1_vec)
@@ -129,7 +129,7 @@ class AnnotatorTest(unittest.TestCase):
         print("Optimal basis computation finished.")
         print(f"cycles: {len(cycles)}")
 
-        base_data = om_to_vis_polydata(mesh)
+        base_data = mesh_to_vis_polydata(mesh.points(), mesh.fv_indices())
         for i in range(0, len(cycles)):
             edge_data = lines_to_vis_polydata(
                     volumetricGraphBase._points,
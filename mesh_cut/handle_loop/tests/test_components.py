@@ -0,0 +1,68 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.components import connected_components, compute_component_bases
+import unittest
+import openmesh as om
+
+class ComponentsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus0': om.read_trimesh(f"{MESH_BASEPATH}/Genus0.obj"),
+            'genus1': om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj"),
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def assembly(self, names):
+        """Disjoint union of the meshes, returns (points, fv_indices, vertex_offsets)"""
+        points, faces, offsets = [], [], [0]
+        for idx, name in enumerate(names):
+            mesh = self.meshes[name]
+            points.append(mesh.points() + [10.0 * idx, 0, 0])
+            faces.append(mesh.fv_indices() + offsets[-1])
+            offsets.append(offsets[-1] + mesh.n_vertices())
+        return np.concatenate(points), np.concatenate(faces), offsets
+
+    def test_connected_components(self):
+        points, fv_indices, offsets = self.assembly(['genus2', 'genus0', 'genus1'])
+        n_components, labels = connected_components(fv_indices, len(points))
+
+        self.assertEqual(n_components, 3)
+        for c in range(0, 3):
+            self.assertTrue((labels[offsets[c]:offsets[c + 1]] == c).all())
+
+    def test_component_bases(self):
+        points, fv_indices, offsets = self.assembly(['genus1', 'genus0', 'genus2'])
+        cycles = compute_component_bases(points, fv_indices, n_workers=2)
+
+        self.assertEqual(sorted(set(cycle[0] for cycle in cycles)), [0, 2])
+        for c, name in ((0, 'genus1'), (2, 'genus2')):
+            graphBase = GraphBase.from_openmesh(self.meshes[name])
+            graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+            expected = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+
+            component_cycles = [cycle for cycle in cycles if cycle[0] == c]
+            self.assertTrue(np.allclose(
+                [cycle[0] for cycle in expected],
+                [cycle[1] for cycle in component_cycles]
+            ))
+            for _, _, path, _ in component_cycles:
+                self.assertTrue(all(offsets[c] <= v < offsets[c + 1] for v in path))
+
+    def test_component_bases_volumetric(self):
+        # genus1 is offset by 10 along x, away from the origin
+        points, fv_indices, offsets = self.assembly(['genus2', 'genus1'])
+        cycles = compute_component_bases(points, fv_indices, annotation='volumetric', n_workers=1)
+
+        for c, name, genus in ((0, 'genus2', 2), (1, 'genus1', 1)):
+            mesh = self.meshes[name]
+            expected = compute_component_bases(mesh.points(), mesh.fv_indices(), annotation='volumetric', n_workers=1)
+
+            component_cycles = [cycle for cycle in cycles if cycle[0] == c]
+            self.assertEqual(len(component_cycles), genus)
+            self.assertTrue(np.allclose(
+                [cycle[1] for cycle in expected],
+                [cycle[1] for cycle in component_cycles]
+            ))
@@ -0,0 +1,71 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.components import connected_components
+from mesh_cut.handle_loop.cut import half_edge_twins, cut_graph, cut_mesh, cut_to_disk
+import unittest
+import openmesh as om
+
+class CutTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus1': om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj"),
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def assertDisk(self, fv_indices):
+        n_vertices = int(fv_indices.max()) + 1
+        n_components, _ = connected_components(fv_indices, n_vertices)
+        self.assertEqual(n_components, 1)
+
+        twin, keys = half_edge_twins(fv_indices)
+        n_edges = len(np.unique(keys))
+        self.assertEqual(n_vertices - n_edges + len(fv_indices), 1)
+
+        # boundary is one cycle
+        boundary = np.flatnonzero(twin < 0)
+        vs = fv_indices.reshape(-1)[boundary]
+        vd = fv_indices[:, [1, 2, 0]].reshape(-1)[boundary]
+        self.assertTrue((np.bincount(vs, minlength=n_vertices)[vs] == 1).all())
+        boundary_vertices = np.unique(vs)
+        n_boundary_components, _ = connected_components(
+            np.stack([vs, vd, vd], axis=1), n_vertices
+        )
+        self.assertEqual(n_boundary_components - (n_vertices - len(boundary_vertices)), 1)
+
+    def test_cut_to_disk(self):
+        for name in ('genus1', 'genus2'):
+            mesh = self.meshes[name]
+            graphBase = GraphBase.from_openmesh(mesh)
+            graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+            loops = [path for _, path, _ in HomologyBasisOptimizer(graphBase).compute_optimal_basis()]
+
+            points, fv_indices, vertex_map = cut_to_disk(mesh.points(), mesh.fv_indices(), loops)
+            self.assertDisk(fv_indices)
+            self.assertTrue((vertex_map[fv_indices] == mesh.fv_indices()).all())
+            self.assertTrue(np.allclose(points, mesh.points()[vertex_map]))
+
+            # every loop edge is on the cut, so on the boundary twice
+            twin, _ = half_edge_twins(fv_indices)
+            boundary = np.flatnonzero(twin < 0)
+            boundary_edges = set(zip(
+                vertex_map[fv_indices.reshape(-1)[boundary]].tolist(),
+                vertex_map[fv_indices[:, [1, 2, 0]].reshape(-1)[boundary]].tolist()
+            ))
+            for path in loops:
+                for va, vb in zip(path[:-1], path[1:]):
+                    self.assertIn((va, vb), boundary_edges)
+                    self.assertIn((vb, va), boundary_edges)
+
+    def test_cut_mesh(self):
+        mesh = self.meshes['genus1']
+        fv_indices = mesh.fv_indices()
+        # a generic cut graph, and no cut
+        points, cut_fv_indices, vertex_map = cut_mesh(mesh.points(), fv_indices, cut_graph(fv_indices))
+        self.assertDisk(cut_fv_indices)
+
+        points, cut_fv_indices, vertex_map = cut_mesh(mesh.points(), fv_indices, np.zeros((0, 2)))
+        self.assertEqual(len(points), mesh.n_vertices())
+        self.assertTrue((vertex_map[cut_fv_indices] == fv_indices).all())
@@ -0,0 +1,103 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+import unittest
+import tempfile
+import openmesh as om
+
+class GraphBaseTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus1': om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj"),
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def test_edge_arrays(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+
+        self.assertEqual(graphBase.edges.shape, (graphBase.n_edges, 2))
+        self.assertTrue((graphBase.edges[:, 0] < graphBase.edges[:, 1]).all())
+
+        for face, fe in zip(graphBase._fv_indices, graphBase.fe_indices):
+            self.assertEqual(graphBase.rev_edge_lookup[fe[0]], tuple(sorted((face[0], face[1]))))
+            self.assertEqual(graphBase.rev_edge_lookup[fe[1]], tuple(sorted((face[1], face[2]))))
+            self.assertEqual(graphBase.rev_edge_lookup[fe[2]], tuple(sorted((face[0], face[2]))))
+
+        for (vs, vd), length in zip(graphBase.edges, graphBase.edge_lengths):
+            self.assertAlmostEqual(graphBase._v_pool.get(vs).edges[vd][1], length)
+
+    def test_cache_roundtrip(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            graphBase.save_cache(cache_dir)
+            cached = GraphBase.from_cache(cache_dir)
+
+            self.assertIsInstance(cached.edges, np.memmap)
+            self.assertEqual(cached.genus, graphBase.genus)
+            self.assertEqual(cached.edge_lookup, graphBase.edge_lookup)
+            self.assertTrue(np.array_equal(cached.fe_indices, graphBase.fe_indices))
+            self.assertTrue(np.allclose(cached.edge_lengths, graphBase.edge_lengths))
+
+    def test_volumetric_shell_options(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        for options in ({}, {'shell': 'hull'}, {'switches': 'pY'}, {'grading': 1.0}):
+            volumetricGraphBase = GraphBase.volumetric_from_openmesh(self.meshes['genus1'], **options)
+
+            self.assertGreater(volumetricGraphBase.tetgen_stats['n_tetras'], 0)
+            self.assertTrue(graphBase.edge_set <= volumetricGraphBase.edge_set)
+
+        with self.assertRaises(Exception):
+            GraphBase.volumetric_from_openmesh(self.meshes['genus1'], switches='pY', grading=1.0)
+
+    def test_graded_sizing_chunks(self):
+        mesh = self.meshes['genus2']
+        shell_points, _ = box_shell(mesh.points(), 0.5)
+        sizing = graded_sizing(mesh.points(), mesh.fv_indices(), shell_points, 1.0)
+        chunked_sizing = graded_sizing(mesh.points(), mesh.fv_indices(), shell_points, 1.0, chunk_size=1)
+        self.assertTrue(np.allclose(sizing, chunked_sizing))
+
+    def test_interior_points(self):
+        mesh = self.meshes['genus2']
+        points = np.concatenate([mesh.points(), mesh.points() + [10.0, -5.0, 3.0]])
+        fv_indices = np.concatenate([mesh.fv_indices(), mesh.fv_indices() + mesh.n_vertices()])
+
+        holes = interior_points(points, fv_indices)
+        self.assertEqual(len(holes), 2)
+        n_faces = len(mesh.fv_indices())
+        for c, hole in enumerate(holes):
+            numbers = winding_numbers(points, fv_indices[c * n_faces:(c + 1) * n_faces], np.array([hole]))
+            self.assertAlmostEqual(abs(numbers[0]), 1.0, places=3)
+
+    def test_reorder(self):
+        mesh = self.meshes['genus2']
+        rng = np.random.default_rng(0)
+        perm = rng.permutation(mesh.n_vertices())
+        rank = np.empty_like(perm)
+        rank[perm] = np.arange(len(perm))
+        points = mesh.points()[perm]
+        fv_indices = rank[mesh.fv_indices()]
+
+        graphBase = GraphBase(points, fv_indices)
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+
+        for reorder in ('rcm', 'morton'):
+            reordered = GraphBase(points, fv_indices, reorder=reorder)
+            self.assertEqual(sorted(reordered.vertex_order.tolist()), list(range(0, graphBase.n_vertices)))
+            self.assertTrue(np.allclose(reordered._points, points[reordered.vertex_order]))
+            self.assertTrue(np.array_equal(
+                reordered.original_vertex_ids(reordered._fv_indices),
+                fv_indices[reordered.face_order]
+            ))
+
+            reordered.set_annotation(*TreeCotreeAnnotator(reordered).compute_annotation())
+            reordered_cycles = HomologyBasisOptimizer(reordered).compute_optimal_basis()
+            self.assertTrue(np.allclose(
+                [cycle[0] for cycle in cycles],
+                [cycle[0] for cycle in reordered_cycles]
+            ))
+            for length, path, _ in reordered_cycles:
+                self.assertAlmostEqual(length, graphBase.get_path_length(reordered.original_vertex_ids(path)))
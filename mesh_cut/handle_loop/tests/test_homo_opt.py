@@ -1,6 +1,11 @@
 from mesh_cut.handle_loop.graphbase import *
-from mesh_cut.handle_loop.annotator import Annotator
+from mesh_cut.handle_loop.annotator import Annotator, TreeCotreeAnnotator
 from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.candidates import CandidatePool
+from mesh_cut.handle_loop.sp_tree import SpanningTree
+from mesh_cut.handle_loop.linalg import unpack_z2_rows
+import tempfile
+import os
 import unittest
 import openmesh as om
 
@@ -25,8 +30,204 @@ class HomologyOptimizerTest(unittest.TestCase):
         optim = HomologyBasisOptimizer(graphBase)
 
         optim.compute_optimal_basis()
+
+    def test_optim_spill(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        annotator = Annotator(graphBase)
+
+        annotation, null_vector = annotator.compute_annotation()
+        graphBase.set_annotation(annotation, null_vector)
+
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+        spilled_cycles = HomologyBasisOptimizer(graphBase, spill_threshold=1).compute_optimal_basis()
+
+        self.assertEqual(len(cycles), 2 * graphBase.genus)
+        self.assertEqual(
+            [(length, path) for length, path, _ in cycles],
+            [(length, path) for length, path, _ in spilled_cycles]
+        )
     
+    def test_pool_spill(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            pool = CandidatePool(spill_threshold=1, spill_dir=spill_dir)
+            self.assertTrue(pool.offer(1, (2.0, [0, 1, 0], None)))
+            self.assertTrue(pool.offer(2, (3.0, [0, 2, 0], None)))
+            self.assertEqual(len(pool.spill_files), 1)
+
+            # spilled classes still reject longer cycles
+            self.assertFalse(pool.improves(1, 2.0))
+            self.assertFalse(pool.offer(1, (5.0, [0, 3, 0], None)))
+            self.assertTrue(pool.offer(1, (1.0, [0, 4, 0], None)))
+            self.assertEqual(len(pool), 2)
+
+            self.assertEqual([cycle[:2] for cycle in pool.cycles()], [(1.0, [0, 4, 0]), (3.0, [0, 2, 0])])
+            self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_optim_tree_cotree(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*Annotator(graphBase).compute_annotation())
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+
+        cotreeGraphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        cotreeGraphBase.set_annotation(*TreeCotreeAnnotator(cotreeGraphBase).compute_annotation())
+        cotree_cycles = HomologyBasisOptimizer(cotreeGraphBase).compute_optimal_basis()
+
+        self.assertTrue(np.allclose(
+            [cycle[0] for cycle in cycles],
+            [cycle[0] for cycle in cotree_cycles]
+        ))
+
     def test_volumetric_openmesh(self):
         graphBase = GraphBase.volumetric_from_openmesh(self.meshes['genus1'])
 
-        
\ No newline at end of file
+        
+
+    def test_surface_edge_annotation(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        volumetricGraphBase = GraphBase.volumetric_from_openmesh(self.meshes['genus1'])
+
+        annotation, null_vector = Annotator(volumetricGraphBase).compute_annotation()
+        surface_annotation, surface_null_vector = \
+            Annotator(volumetricGraphBase).compute_annotation(edges=graphBase.edge_set)
+
+        self.assertTrue(set(surface_annotation.keys()) <= graphBase.edge_set)
+        for e in graphBase.edge_set:
+            self.assertTrue((annotation.get(e, null_vector) == surface_annotation.get(e, surface_null_vector)).all())
+
+    def test_tree_cotree_edges(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        annotation, null_vector = TreeCotreeAnnotator(graphBase).compute_annotation()
+
+        edges = sorted(graphBase.edge_set)[::3]
+        edge_annotation, _ = TreeCotreeAnnotator(graphBase).compute_annotation(edges=edges)
+        self.assertTrue(set(edge_annotation.keys()) <= set(edges))
+        for e in edges:
+            self.assertTrue((annotation.get(e, null_vector) == edge_annotation.get(e, null_vector)).all())
+
+        with self.assertRaises(Exception):
+            TreeCotreeAnnotator(graphBase).compute_annotation(edges=[(0, graphBase.n_vertices)])
+
+    def test_collapsed_volumetric(self):
+        lengths = []
+        for collapse in (False, True):
+            graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+            volumetricGraphBase = GraphBase.volumetric_from_openmesh(self.meshes['genus1'], collapse=collapse)
+            self.assertTrue(graphBase.edge_set <= volumetricGraphBase.edge_set)
+
+            annotator = Annotator(volumetricGraphBase)
+            graphBase.set_annotation(*annotator.compute_annotation(edges=graphBase.edge_set))
+            cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+            lengths.append([cycle[0] for cycle in cycles])
+
+        self.assertTrue(np.allclose(lengths[0], lengths[1]))
+
+    def test_score_tree(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        optim = HomologyBasisOptimizer(graphBase)
+
+        sp_tree = SpanningTree(graphBase)
+        sp_tree.build_spt(3, True)
+        edge_ids, cycle_lengths, annotation_words = optim.score_tree(sp_tree)
+        self.assertGreater(len(edge_ids), 0)
+
+        annotations = unpack_z2_rows(annotation_words, 2 * graphBase.genus)
+        for e_idx, cycle_length, annotation in zip(edge_ids, cycle_lengths, annotations):
+            vs, vd = graphBase.rev_edge_lookup[e_idx]
+            path = sp_tree.get_path(vs, vd) + [vs]
+            self.assertIn(3, path)
+            self.assertAlmostEqual(graphBase.get_path_length(path), cycle_length)
+
+            path_annotation = graphBase.annotation_null_vector
+            for i in range(1, len(path)):
+                path_annotation = path_annotation ^ graphBase.get_edge_annotation(path[i - 1], path[i])
+            self.assertTrue((path_annotation == annotation).all())
+
+
+    def test_optim_warm_start(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+        warm_cycles = HomologyBasisOptimizer(graphBase, warm_start=True).compute_optimal_basis()
+        self.assertTrue(np.allclose(
+            [cycle[0] for cycle in cycles],
+            [cycle[0] for cycle in warm_cycles]
+        ))
+
+    def test_optim_delta_stepping(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+        delta_cycles = HomologyBasisOptimizer(graphBase, sssp='delta_stepping').compute_optimal_basis()
+        self.assertTrue(np.allclose(
+            [cycle[0] for cycle in cycles],
+            [cycle[0] for cycle in delta_cycles]
+        ))
+
+    def test_optim_anytime(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        optimizer = HomologyBasisOptimizer(graphBase)
+        cycles = optimizer.compute_optimal_basis()
+
+        # a single source within the budget
+        first_cycles, info = optimizer.compute_basis_anytime(0)
+        self.assertAlmostEqual(info['fraction_processed'], 1 / graphBase.n_vertices)
+        if info['complete']:
+            for cycle, first_cycle in zip(cycles, first_cycles):
+                self.assertLessEqual(first_cycle[0], cycle[0] + 2 * info['covering_radius'] + 1e-6)
+
+        all_cycles, info = optimizer.compute_basis_anytime(float('inf'))
+        self.assertTrue(info['complete'])
+        self.assertEqual(info['fraction_processed'], 1)
+        self.assertEqual(info['optimality_gap'], 0)
+        self.assertTrue(np.allclose(
+            [cycle[0] for cycle in cycles],
+            [cycle[0] for cycle in all_cycles]
+        ))
+
+    def test_optim_checkpoint(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+
+        class PreemptedOptimizer(HomologyBasisOptimizer):
+            def build_spt(self, sp_tree, start):
+                if start == graphBase.n_vertices // 2:
+                    raise KeyboardInterrupt()
+                super().build_spt(sp_tree, start)
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            checkpoint_path = f"{checkpoint_dir}/sweep.ckpt"
+            with self.assertRaises(KeyboardInterrupt):
+                PreemptedOptimizer(graphBase, spill_threshold=1).compute_optimal_basis(checkpoint_path, 0)
+
+            resumed_cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis(checkpoint_path, 0)
+            self.assertEqual(
+                [(length, path) for length, path, _ in cycles],
+                [(length, path) for length, path, _ in resumed_cycles]
+            )
+
+            # another annotation must not resume
+            otherGraphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+            otherGraphBase.set_annotation(*Annotator(otherGraphBase).compute_annotation())
+            with self.assertRaises(Exception):
+                HomologyBasisOptimizer(otherGraphBase).compute_optimal_basis(checkpoint_path)
+
+    def test_optim_shortest_loop(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus1'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        optimizer = HomologyBasisOptimizer(graphBase)
+        cycles = optimizer.compute_optimal_basis()
+
+        length, path, annotation = optimizer.compute_shortest_loop()
+        self.assertAlmostEqual(length, cycles[0][0])
+        self.assertEqual(path[0], path[-1])
+        self.assertAlmostEqual(length, graphBase.get_path_length(path))
+        self.assertTrue(annotation.any())
+
+        sphereGraphBase = GraphBase.from_openmesh(self.meshes['genus0'])
+        sphereGraphBase.set_annotation(*TreeCotreeAnnotator(sphereGraphBase).compute_annotation())
+        self.assertIsNone(HomologyBasisOptimizer(sphereGraphBase).compute_shortest_loop())
@@ -104,4 +104,57 @@ class LinAlgTest(unittest.TestCase):
         ], dtype=np.int8)
 
         res = solve_z2(a, a_b)
-        self.assertTrue(((a @ res - a_b) % 2 == 0).all())
\ No newline at end of file
+        self.assertTrue(((a @ res - a_b) % 2 == 0).all())
+
+    def test_Bopt_m4ri(self):
+        rng = np.random.default_rng(0)
+        for _ in range(0, 50):
+            m, n = rng.integers(1, 80), rng.integers(1, 150)
+            a = (rng.random((m, n)) < rng.random() * 0.3).astype(np.int8)
+            if n > 2:
+                a[:, n // 2] = a[:, 0] ^ a[:, 1]
+
+            for k in (1, 4, 8):
+                self.assertEqual(get_Bopt_column_m4ri(a, k), get_Bopt_column_rowwise(a))
+
+    def test_solve_m4ri(self):
+        rng = np.random.default_rng(1)
+        a = (rng.random((120, 70)) < 0.3).astype(np.int8)
+        a = a[:, get_Bopt_column(a)]
+        x = (rng.random((a.shape[1], 5)) < 0.5).astype(np.int8)
+        z = (a.astype(np.int64) @ x % 2).astype(np.int8)
+
+        res = solve_z2_m4ri(a, z)
+        self.assertTrue((res == x).all())
+        self.assertTrue((solve_z2_sequential(a, z) == x).all())
+
+    def test_xor_basis(self):
+        f = np.array([
+            [1, 0, 0, 1],
+            [0, 0, 0, 1],
+            [0, 1, 0, 0]
+        ], dtype=np.int8)
+
+        xor_basis = XorBasis(3)
+        selected = [idx for idx in range(0, 4) if xor_basis.insert(pack_z2_vector(f[:, idx]))]
+
+        self.assertEqual(selected, get_Bopt_column(f))
+        self.assertTrue(xor_basis.is_full())
+        self.assertEqual(pack_z2_vector([1, 0, 1]), 5)
+
+    def test_xor_basis_parity_check(self):
+        rng = np.random.default_rng(1)
+        for dim in (1, 5, 70):
+            xor_basis = XorBasis(dim)
+            while xor_basis.rank() < dim - 1:
+                xor_basis.insert(int(rng.integers(0, 2, dim).dot(1 << np.arange(dim, dtype=object))))
+
+            f = xor_basis.parity_check()
+            self.assertNotEqual(f, 0)
+            for word in xor_basis.basis.values():
+                self.assertEqual(bin(f & word).count("1") % 2, 0)
+
+    def test_odd_z2_rows(self):
+        rng = np.random.default_rng(2)
+        A = rng.integers(0, 2, (50, 130))
+        self.assertTrue((odd_z2_rows(pack_z2_rows(A)) == (A.sum(axis=1) % 2 == 1)).all())
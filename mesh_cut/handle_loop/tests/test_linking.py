@@ -0,0 +1,42 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.linking import linking_number, classify_loops
+import unittest
+import openmesh as om
+
+class LinkingTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus1': om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj"),
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def test_linking_number(self):
+        t = np.linspace(0, 2 * np.pi, 65)
+        circle = np.stack([np.cos(t), np.sin(t), np.zeros_like(t)], axis=1)
+        linked = np.stack([1 + np.cos(t), np.zeros_like(t), np.sin(t)], axis=1)
+
+        self.assertTrue(np.isclose(abs(linking_number(circle, linked)), 1.0))
+        self.assertTrue(np.isclose(linking_number(circle, linked, chunk_size=7), linking_number(circle, linked)))
+        self.assertTrue(np.isclose(linking_number(circle, linked[::-1]), -linking_number(circle, linked)))
+        self.assertTrue(np.isclose(linking_number(circle, linked + [5.0, 0, 0]), 0.0))
+
+    def test_classify_loops(self):
+        for name, genus in (('genus1', 1), ('genus2', 2)):
+            mesh = self.meshes[name]
+            graphBase = GraphBase.from_openmesh(mesh)
+            graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+            paths = [path for _, path, _ in HomologyBasisOptimizer(graphBase).compute_optimal_basis()]
+
+            labels, inside, outside = classify_loops(mesh.points(), mesh.fv_indices(), paths)
+            self.assertEqual(sorted(labels), ['handle'] * genus + ['tunnel'] * genus)
+            # the linking form pairs the g tunnel (inside) & g handle (outside) classes
+            self.assertEqual(np.linalg.matrix_rank(inside), genus)
+            self.assertTrue((outside == inside.T).all())
+
+            handles = [path for path, label in zip(paths, labels) if label == 'handle']
+            handle_labels, _, _ = classify_loops(mesh.points(), mesh.fv_indices(), handles, reference=paths)
+            self.assertEqual(handle_labels, ['handle'] * genus)
@@ -0,0 +1,53 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.multires import decimate, tube_graph, MultiresolutionOptimizer
+from mesh_cut.handle_loop.linalg import XorBasis, pack_z2_vector
+import unittest
+import openmesh as om
+
+class MultiresolutionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def test_decimate(self):
+        mesh = self.meshes['genus2']
+        coarse_mesh, coarse_to_fine = decimate(mesh, 20)
+
+        self.assertEqual(coarse_mesh.n_vertices(), 20)
+        self.assertTrue(np.allclose(coarse_mesh.points(), mesh.points()[coarse_to_fine]))
+        self.assertEqual(GraphBase.from_openmesh(coarse_mesh).genus, 2)
+
+    def test_tube_graph(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+
+        vertex_mask = np.zeros(graphBase.n_vertices, dtype=bool)
+        vertex_mask[graphBase._fv_indices[:len(graphBase._fv_indices) // 2]] = True
+        tube, sub_to_full = tube_graph(graphBase, vertex_mask)
+
+        # an open sub-surface, not a tet complex
+        self.assertFalse(tube.volumetric)
+        self.assertEqual(len(sub_to_full), vertex_mask.sum())
+        full_edges = {(int(sub_to_full[vs]), int(sub_to_full[vd])) for vs, vd in tube.edges.tolist()}
+        self.assertTrue(full_edges <= graphBase.edge_set)
+
+    def test_multires_basis(self):
+        mesh = self.meshes['genus2']
+        graphBase = GraphBase.from_openmesh(mesh)
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+
+        multires_cycles = MultiresolutionOptimizer(mesh, 20).compute_basis()
+
+        xor_basis = XorBasis(2 * graphBase.genus)
+        for cycle, multires_cycle in zip(cycles, multires_cycles):
+            length, path, annotation = multires_cycle
+            self.assertEqual(path[0], path[-1])
+            self.assertAlmostEqual(length, graphBase.get_path_length(path))
+            self.assertGreaterEqual(length, cycle[0] - 1e-9)
+            self.assertTrue(xor_basis.insert(pack_z2_vector(annotation)))
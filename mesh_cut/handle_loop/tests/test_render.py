@@ -0,0 +1,40 @@
+from mesh_cut.handle_loop.render import BatchRenderer, render_cycles, lines_to_vis_polydata, path_to_vis_polydata
+import numpy as np
+import tempfile
+import unittest
+import os
+import openmesh as om
+
+class RenderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.mesh = om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj")
+        self.paths = [[0, 1, 2, 0], [3, 4, 5, 3]]
+        # a closed loop along edges of the mesh
+        fv = self.mesh.fv_indices()
+        self.paths.append([fv[0, 0], fv[0, 1], fv[0, 2], fv[0, 0]])
+
+    def test_loop_polydata(self):
+        points = self.mesh.points()
+        poly = path_to_vis_polydata(points, self.paths[2])
+        self.assertEqual(poly.n_points, 4)
+        self.assertTrue(np.allclose(poly.points, points[self.paths[2]]))
+
+        path = self.paths[2]
+        poly = lines_to_vis_polydata(points, list(zip(path[:-1], path[1:])))
+        self.assertEqual(poly.n_points, 3)
+        self.assertEqual(poly.n_lines, 3)
+
+    def test_render_cycles(self):
+        points, fv_indices = self.mesh.points(), self.mesh.fv_indices()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jobs = [(os.path.join(tmp_dir, f"{i}.png"), path) for i, path in enumerate(self.paths)]
+            render_cycles(points, fv_indices, jobs, window_size=(320, 240))
+            for filename, _ in jobs:
+                self.assertTrue(os.path.getsize(filename) > 0)
+
+            parallel_jobs = [(os.path.join(tmp_dir, f"parallel_{i}.png"), path) for i, path in enumerate(self.paths)]
+            render_cycles(points, fv_indices, parallel_jobs, n_workers=2, window_size=(320, 240))
+            for filename, _ in parallel_jobs:
+                self.assertTrue(os.path.getsize(filename) > 0)
@@ -0,0 +1,52 @@
+from mesh_cut.handle_loop.components import compute_component_bases
+from mesh_cut.handle_loop.service import HandleLoopService, ServiceClient
+import numpy as np
+import threading
+import tempfile
+import unittest
+import asyncio
+import os
+import openmesh as om
+
+class ServiceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.mesh_path = os.path.abspath(f"{MESH_BASEPATH}/Genus2.obj")
+        self.mesh = om.read_trimesh(self.mesh_path)
+
+    def test_service(self):
+        expected = compute_component_bases(self.mesh.points(), self.mesh.fv_indices(), n_workers=1)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            service = HandleLoopService(os.path.join(tmp_dir, 'service.sock'), n_workers=1)
+            ready = threading.Event()
+            thread = threading.Thread(target=asyncio.run, args=(service.serve(ready),), daemon=True)
+            thread.start()
+            self.assertTrue(ready.wait(60))
+
+            try:
+                with ServiceClient(service.address, timeout=120) as client:
+                    with open(self.mesh_path, 'rb') as f:
+                        data = f.read()
+                    results = [
+                        client.basis(path=self.mesh_path),
+                        client.basis(data=data, mesh_format='obj'),
+                        client.basis(data=data, mesh_format='obj'),
+                        client.basis(points=self.mesh.points(), fv_indices=self.mesh.fv_indices()),
+                    ]
+                    stats, _ = client.request({'op': 'stats'})
+                    with self.assertRaises(Exception):
+                        client.basis(data=data, mesh_format='obj', annotation='unknown')
+            finally:
+                service.stop()
+                thread.join(30)
+
+        for cycles in results:
+            self.assertEqual(len(cycles), len(expected))
+            for (component_id, length, path), expected_cycle in zip(cycles, expected):
+                self.assertEqual(component_id, expected_cycle[0])
+                self.assertTrue(np.isclose(length, expected_cycle[1]))
+                self.assertEqual(path, expected_cycle[2])
+        self.assertEqual(stats['result_hits'], 1)
+        self.assertEqual(stats['computed'], 3)
@@ -0,0 +1,32 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.homology_opt import HomologyBasisOptimizer
+from mesh_cut.handle_loop.shard import ShardCoordinator
+import tempfile
+import unittest
+import openmesh as om
+
+class ShardTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def test_sharded_sweep(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+        cycles = HomologyBasisOptimizer(graphBase).compute_optimal_basis()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            graphBase.save_cache(cache_dir)
+            graphBase.save_annotation(cache_dir)
+
+            coordinator = ShardCoordinator(graphBase, cache_dir, chunk_size=3)
+            sharded_cycles = coordinator.run(n_local_workers=2, timeout=120)
+
+        self.assertEqual(
+            [(length, path) for length, path, _ in cycles],
+            [(length, path) for length, path, _ in sharded_cycles]
+        )
@@ -0,0 +1,97 @@
+from mesh_cut.handle_loop.graphbase import *
+from mesh_cut.handle_loop.sp_tree import SpanningTree
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+import unittest
+import openmesh as om
+
+class SpanningTreeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus1': om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj"),
+            'genus2': om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj")
+        }
+
+    def test_mst_kruskal(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+
+        kruskal = SpanningTree(graphBase)
+        kruskal.build_mst()
+        prim = SpanningTree(graphBase)
+        prim.build_mst_prim()
+
+        self.assertEqual(len(kruskal.edge_set), graphBase.n_vertices - 1)
+        self.assertAlmostEqual(
+            sum(graphBase.edge_lengths[kruskal.tree_edge_mask]),
+            sum(dist for _, dist in prim.parent_tree.values())
+        )
+        self.assertEqual(set(kruskal.get_residual_edges()), graphBase.edge_set - kruskal.edge_set)
+
+        for child, (parent, _) in kruskal.parent_tree.items():
+            self.assertEqual(kruskal.parent[child], parent)
+        self.assertEqual(kruskal.parent[kruskal.root_id], -1)
+
+    def test_spt_warm_start(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+
+        mst = SpanningTree(graphBase)
+        mst.build_mst()
+        preorder = mst.get_preorder()
+        self.assertEqual(sorted(preorder), list(range(0, graphBase.n_vertices)))
+
+        prev = None
+        for v in preorder:
+            cold = SpanningTree(graphBase)
+            cold.build_spt(v, True)
+            warm = SpanningTree(graphBase)
+            if prev is None:
+                warm.build_spt(v, True)
+            else:
+                warm.build_spt_from(prev, v, True)
+            prev = warm
+
+            self.assertTrue(np.allclose(cold.dists, warm.dists))
+            self.assertEqual(len(warm.edge_set), graphBase.n_vertices - 1)
+            # annotation of a vertex is the one of its tree path
+            for child, (parent, _) in warm.parent_tree.items():
+                self.assertTrue(np.array_equal(
+                    warm.vertex_annotation_words[child],
+                    warm.vertex_annotation_words[parent] ^
+                        graphBase.edge_annotation_words[graphBase.edge_index(child, parent)]
+                ))
+
+    def test_spt_delta_stepping(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+
+        for v in range(0, graphBase.n_vertices):
+            dijkstra = SpanningTree(graphBase)
+            dijkstra.build_spt(v, True)
+            delta = SpanningTree(graphBase)
+            delta.build_spt_delta(v, True)
+
+            self.assertTrue(np.allclose(dijkstra.dists, delta.dists))
+            self.assertEqual(len(delta.edge_set), graphBase.n_vertices - 1)
+            for child, (parent, dist) in delta.parent_tree.items():
+                self.assertAlmostEqual(delta.dists[child], delta.dists[parent] + dist)
+                self.assertTrue(np.array_equal(
+                    delta.vertex_annotation_words[child],
+                    delta.vertex_annotation_words[parent] ^
+                        graphBase.edge_annotation_words[graphBase.edge_index(child, parent)]
+                ))
+
+    def test_spt_level_order(self):
+        graphBase = GraphBase.from_openmesh(self.meshes['genus2'])
+        graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+
+        for v in range(0, graphBase.n_vertices):
+            relaxed = SpanningTree(graphBase)
+            relaxed.build_spt(v, True)
+            level = SpanningTree(graphBase)
+            level.build_spt(v, True, level_order=True)
+
+            self.assertIsNone(level.vertice_annotation)
+            self.assertTrue(np.array_equal(level.parent, relaxed.parent))
+            self.assertTrue(np.array_equal(level.vertex_annotation_words, relaxed.vertex_annotation_words))
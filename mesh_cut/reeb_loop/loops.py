@@ -0,0 +1,192 @@
+"""
+Handle & tunnel candidate loops from a Reeb graph
+
+Arcs are weighted by the height of their bottom node; each arc e off the maximum
+weight spanning tree closes a canonical cycle c_e whose lowest node is the
+bottom of e. c_e is lifted to the surface arc by arc, each a shortest path
+between its end nodes over the mesh edges crossing the arc. Its dual is the
+level set loop of e just above that node, walked along the vertices below it.
+The g lifted cycles & g duals span H_1 of a closed genus g surface.
+"""
+
+from mesh_cut.handle_loop.annotator import TreeCotreeAnnotator
+from mesh_cut.handle_loop.graphbase import GraphBase
+from mesh_cut.handle_loop.linalg import unpack_z2_rows
+from .reeb import ReebGraph
+import numpy as np
+import logging
+import heapq
+
+logger = logging.getLogger(__name__)
+
+def remove_spurs(path: list):
+    """Drops back & forth steps (.., a, b, a, ..) of a closed path"""
+    loop = []
+    for v in path:
+        if len(loop) >= 2 and loop[-2] == v:
+            loop.pop()
+        elif len(loop) == 0 or loop[-1] != v:
+            loop.append(v)
+    while len(loop) > 3 and loop[1] == loop[-2]:
+        loop = loop[1:-1]
+    return loop
+
+class ReebLoops:
+    """Basis loops of a closed mesh in the handle_loop output format, without tetgen
+    and without a sweep over all sources"""
+    def __init__(self, points: np.ndarray, fv_indices: np.ndarray, direction: np.ndarray = None):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.fv_indices = np.asarray(fv_indices, dtype=np.int64)
+        self.reeb = ReebGraph(self.points, self.fv_indices, direction)
+
+        edges = self.reeb.edges
+        self.edge_lengths = np.linalg.norm(self.points[edges[:, 0]] - self.points[edges[:, 1]], axis=1)
+        # each edge of a closed manifold has two faces
+        self.edge_faces = (np.argsort(self.reeb.face_edges.reshape(-1), kind='stable') // 3).reshape(-1, 2)
+
+    def canonical_cycles(self):
+        """[(arc, steps)], steps: [(arc, from_node, to_node)] of the closed cycle from bottom(arc) up arc"""
+        reeb = self.reeb
+        n_nodes = len(reeb.nodes)
+        weights = reeb.ranks[reeb.nodes[reeb.arcs[:, 0]]]
+
+        # maximum weight spanning forest, Kruskal
+        component = list(range(0, n_nodes))
+        def find(x):
+            while component[x] != x:
+                component[x] = component[component[x]]
+                x = component[x]
+            return x
+
+        tree_adjacency = [[] for _ in range(0, n_nodes)]
+        off_tree = []
+        for arc in np.argsort(-weights, kind='stable').tolist():
+            bottom, top = reeb.arcs[arc].tolist()
+            root_bottom, root_top = find(bottom), find(top)
+            if root_bottom == root_top:
+                off_tree.append(arc)
+                continue
+            component[root_bottom] = root_top
+            tree_adjacency[bottom].append((arc, top))
+            tree_adjacency[top].append((arc, bottom))
+
+        # root the forest, (parent arc, parent node) & depth per node
+        parent = [None] * n_nodes
+        depth = [-1] * n_nodes
+        for root in range(0, n_nodes):
+            if depth[root] >= 0:
+                continue
+            depth[root] = 0
+            bfs_order = [root]
+            for node in bfs_order:
+                for arc, neighbor in tree_adjacency[node]:
+                    if depth[neighbor] < 0:
+                        depth[neighbor] = depth[node] + 1
+                        parent[neighbor] = (arc, node)
+                        bfs_order.append(neighbor)
+
+        cycles = []
+        for arc in off_tree:
+            bottom, top = reeb.arcs[arc].tolist()
+            # tree path top -> bottom through their lowest common ancestor
+            up_steps, down_steps = [], []
+            u, v = top, bottom
+            while u != v:
+                if depth[u] >= depth[v]:
+                    parent_arc, parent_node = parent[u]
+                    up_steps.append((parent_arc, u, parent_node))
+                    u = parent_node
+                else:
+                    parent_arc, parent_node = parent[v]
+                    down_steps.append((parent_arc, parent_node, v))
+                    v = parent_node
+            cycles.append((arc, [(arc, bottom, top)] + up_steps + down_steps[::-1]))
+        return cycles
+
+    def shortest_path(self, edges: np.ndarray, source: int, target: int):
+        """Dijkstra over the given mesh edges"""
+        adjacency = {}
+        for e, (vs, vd) in zip(edges.tolist(), self.reeb.edges[edges].tolist()):
+            adjacency.setdefault(vs, []).append((vd, self.edge_lengths[e]))
+            adjacency.setdefault(vd, []).append((vs, self.edge_lengths[e]))
+
+        dists = {source: 0.0}
+        parents = {source: None}
+        heap = [(0.0, source)]
+        while len(heap) > 0:
+            dist, v = heapq.heappop(heap)
+            if v == target:
+                break
+            if dist > dists[v]:
+                continue
+            for neighbor, length in adjacency.get(v, []):
+                if dist + length < dists.get(neighbor, np.inf):
+                    dists[neighbor] = dist + length
+                    parents[neighbor] = v
+                    heapq.heappush(heap, (dist + length, neighbor))
+
+        if target not in parents:
+            raise Exception(f"No path from {source} to {target} over the arc edges.")
+        path = [target]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        return path[::-1]
+
+    def lift_cycle(self, steps: list):
+        """Closed vertex path mapped onto the Reeb graph cycle"""
+        nodes = self.reeb.nodes
+        path = [int(nodes[steps[0][1]])]
+        for arc, from_node, to_node in steps:
+            path += self.shortest_path(self.reeb.edges_of_arc(arc), int(nodes[from_node]), int(nodes[to_node]))[1:]
+        return remove_spurs(path)
+
+    def level_loop(self, arc: int, node: int):
+        """Closed vertex path along the level set loop of arc just above node, through
+        the lower ends of the crossing edges"""
+        edges = self.reeb.level_edges(arc, node)
+        crossing = np.zeros(len(self.reeb.edges), dtype=bool)
+        crossing[edges] = True
+
+        # crossing edges in level set order, two per crossed face
+        start = int(edges[0])
+        ordered = [start]
+        face = int(self.edge_faces[start, 0])
+        while True:
+            face_edges = self.reeb.face_edges[face]
+            e = int(face_edges[crossing[face_edges] & (face_edges != ordered[-1])][0])
+            if e == start:
+                break
+            ordered.append(e)
+            face = int(self.edge_faces[e, 1] if self.edge_faces[e, 0] == face else self.edge_faces[e, 0])
+        if len(ordered) != len(edges):
+            logger.warning(f"Level set of arc {arc} above node {node} has several loops")
+
+        path = self.reeb.edges[ordered, 0].tolist()
+        return remove_spurs(path + path[:1])
+
+    def path_length(self, path: list):
+        path = np.asarray(path)
+        return float(np.linalg.norm(self.points[path[1:]] - self.points[path[:-1]], axis=1).sum())
+
+    def compute_basis(self, annotate: bool = True):
+        """[(cycle_length, path, annotation)] sorted by length, like compute_optimal_basis
+        annotate: tree-cotree annotation of each loop, None otherwise"""
+        loops = []
+        for arc, steps in self.canonical_cycles():
+            loops.append(self.lift_cycle(steps))
+            loops.append(self.level_loop(arc, int(self.reeb.arcs[arc, 0])))
+        logger.info(f"{len(loops)} loops from {len(loops) // 2} Reeb graph cycles")
+
+        annotations = [None] * len(loops)
+        if annotate:
+            graphBase = GraphBase(self.points, self.fv_indices)
+            graphBase.set_annotation(*TreeCotreeAnnotator(graphBase).compute_annotation())
+            dim_h1 = graphBase.annotation_null_vector.shape[0]
+            for i, path in enumerate(loops):
+                path_edges = graphBase.edge_index(path[:-1], path[1:])
+                words = np.bitwise_xor.reduce(graphBase.edge_annotation_words[path_edges], axis=0)
+                annotations[i] = unpack_z2_rows(words[None, :], dim_h1)[0]
+
+        cycles = [(self.path_length(path), path, annotation) for path, annotation in zip(loops, annotations)]
+        cycles.sort(key=lambda cycle: cycle[0])
+        return cycles
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+"""
+Handle & tunnel candidate loops via Reeb graphs
+
+1. height function along the principal axis, Reeb graph by a sweep over
+   sorted vertex heights
+2. canonical cycles of the maximum weight spanning tree, lifted to the surface
+3. level set duals of the cycles
+4. handle / tunnel labels by linking numbers
+"""
+
+from mesh_cut.reeb_loop.loops import ReebLoops
+from mesh_cut.handle_loop.render import render_cycles
+from mesh_cut.handle_loop.linking import classify_loops
+import openmesh as om
+import sys, os
+import logging
+
+logger = logging.getLogger(__name__)
+
+def main(options):
+   logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)40s - %(levelname)s - %(message)s')
+
+   if len(options) not in (1, 2):
+      print(f"Options: obj_file [n_render_workers]")
+      sys.exit(1)
+
+   logger.info(f"Reading {options[0]}")
+   mesh = om.read_trimesh(options[0])
+
+   cycles = ReebLoops(mesh.points(), mesh.fv_indices()).compute_basis()
+   labels, _, _ = classify_loops(mesh.points(), mesh.fv_indices(), [path for _, path, _ in cycles])
+   for (cycle_length, path, _), label in zip(cycles, labels):
+      logger.info(f"{label} loop of length {cycle_length:.5f}, {len(path) - 1} edges")
+
+   resname = os.path.split(options[0])[-1].split(".")[0]
+   render_cycles(
+      mesh.points(), mesh.fv_indices(),
+      [(f"{resname}_{i}_{label}_reeb.png", path) for i, ((_, path, _), label) in enumerate(zip(cycles, labels))],
+      n_workers=int(options[1]) if len(options) == 2 else 1
+   )
+
+if __name__ == '__main__':
+   main(sys.argv[1:])
@@ -0,0 +1,172 @@
+"""
+Reeb graph of a height function on a closed triangle mesh
+
+Heights are ranks of the vertex projections onto a direction, so they are
+distinct. Critical vertices are those whose link does not change sign exactly
+twice, i.e. which are not the middle vertex of exactly two of their faces.
+
+Critical heights split the surface into open slabs. Each mesh edge gives one
+piece per slab and per critical level it crosses; pieces of the same triangle
+in the same slab (level) are joined, a triangle cut by a slab or a level being
+convex. Level components holding a critical vertex are the Reeb graph nodes,
+slab components joined through the other level components are its arcs.
+All joins run through the vectorized union-find of handle_loop.components.
+"""
+
+from mesh_cut.handle_loop.components import union_labels
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+def height_ranks(points: np.ndarray, direction: np.ndarray = None):
+    """Rank of each vertex along direction, defaults to the principal axis of points"""
+    points = np.asarray(points, dtype=np.float64)
+    if direction is None:
+        centered = points - points.mean(axis=0)
+        direction = np.linalg.eigh(centered.T @ centered)[1][:, -1]
+    heights = points @ np.asarray(direction, dtype=np.float64)
+
+    # ties broken by vertex id
+    order = np.lexsort((np.arange(len(points)), heights))
+    ranks = np.empty(len(points), dtype=np.int64)
+    ranks[order] = np.arange(len(points))
+    return ranks
+
+def expand_ranges(counts: np.ndarray):
+    """(owner, k) for k in range(counts[owner]) over all owners"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    k = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, k
+
+class ReebGraph:
+    """
+    nodes: (n_nodes,) critical vertex ids by ascending height
+    arcs: (n_arcs, 2) bottom & top node of each arc
+    vertex_arc: (n_vertices,) arc of each regular vertex, -1 for nodes
+    edges: (n_edges, 2) mesh edges, lower vertex first
+    """
+    def __init__(self, points: np.ndarray, fv_indices: np.ndarray, direction: np.ndarray = None):
+        self.points = np.asarray(points, dtype=np.float64)
+        fv_indices = np.asarray(fv_indices, dtype=np.int64)
+        n_vertices = len(self.points)
+        self.ranks = ranks = height_ranks(self.points, direction)
+
+        # triangle vertices by height, edges (t0, t1), (t1, t2) & the long one (t0, t2)
+        tri = np.take_along_axis(fv_indices, np.argsort(ranks[fv_indices], axis=1), axis=1)
+        keys = np.concatenate([
+            tri[:, 0] * n_vertices + tri[:, 1],
+            tri[:, 1] * n_vertices + tri[:, 2],
+            tri[:, 0] * n_vertices + tri[:, 2]
+        ])
+        edge_keys, face_edges, edge_faces = np.unique(keys, return_inverse=True, return_counts=True)
+        if (edge_faces != 2).any():
+            raise Exception("Mesh is not a closed manifold.")
+        face_edges = face_edges.reshape(3, -1).T
+        self.edges = np.stack([edge_keys // n_vertices, edge_keys % n_vertices], axis=1)
+        self.tri = tri
+        self.face_edges = face_edges
+
+        # link sign changes = number of faces with the vertex in the middle
+        n_changes = np.bincount(tri[:, 1], minlength=n_vertices)
+        self.nodes = np.flatnonzero(n_changes != 2)
+        self.nodes = self.nodes[np.argsort(ranks[self.nodes])]
+        node_heights = ranks[self.nodes]
+        self.node_of_vertex = np.full(n_vertices, -1, dtype=np.int64)
+        self.node_of_vertex[self.nodes] = np.arange(len(self.nodes))
+        n_nodes = len(self.nodes)
+
+        # slab j lies between node heights j - 1 & j, level i is node height i
+        lo, hi = self.edges[:, 0], self.edges[:, 1]
+        self.slab_lo = slab_lo = np.searchsorted(node_heights, ranks[lo], side='right')
+        self.slab_hi = slab_hi = np.searchsorted(node_heights, ranks[hi], side='left')
+        n_slabs = slab_hi - slab_lo + 1
+        n_levels = slab_hi - slab_lo
+        self.slab_offsets = slab_offsets = np.concatenate([[0], np.cumsum(n_slabs)])
+        level_offsets = np.concatenate([[0], np.cumsum(n_levels)])
+        n_slab_pieces, n_level_pieces = slab_offsets[-1], level_offsets[-1]
+        logger.info(f"{n_nodes} critical vertices, {n_slab_pieces} slab & {n_level_pieces} level pieces")
+
+        # pieces of the short edges joined with the long edge piece of the same slab / level
+        slab_pairs, level_pairs = [], []
+        long_edges = face_edges[:, 2]
+        for short_edges in (face_edges[:, 0], face_edges[:, 1]):
+            face, k = expand_ranges(n_slabs[short_edges])
+            s, l = short_edges[face], long_edges[face]
+            slab_pairs.append((slab_offsets[s] + k, slab_offsets[l] + slab_lo[s] + k - slab_lo[l]))
+            face, k = expand_ranges(n_levels[short_edges])
+            s, l = short_edges[face], long_edges[face]
+            level_pairs.append((level_offsets[s] + k, level_offsets[l] + slab_lo[s] + k - slab_lo[l]))
+
+        # critical middle vertices lie on the level piece of the long edge
+        face = np.flatnonzero(self.node_of_vertex[tri[:, 1]] >= 0)
+        level = self.node_of_vertex[tri[face, 1]]
+        l = long_edges[face]
+        level_pairs.append((n_level_pieces + level, level_offsets[l] + level - slab_lo[l]))
+
+        level_labels = union_labels(
+            np.concatenate([pair[0] for pair in level_pairs]),
+            np.concatenate([pair[1] for pair in level_pairs]),
+            n_level_pieces + n_nodes
+        )
+        node_of_root = np.full(n_level_pieces + n_nodes, -1, dtype=np.int64)
+        node_of_root[level_labels[n_level_pieces:]] = np.arange(n_nodes)
+        level_node = node_of_root[level_labels[:n_level_pieces]]
+
+        # slab pieces below & above a regular level component are one arc
+        level_edge, k = expand_ranges(n_levels)
+        below = slab_offsets[level_edge] + k
+        regular = level_node < 0
+        slab_pairs.append((below[regular], below[regular] + 1))
+
+        slab_labels = union_labels(
+            np.concatenate([pair[0] for pair in slab_pairs]),
+            np.concatenate([pair[1] for pair in slab_pairs]),
+            n_slab_pieces
+        )
+        _, self.piece_arc = np.unique(slab_labels, return_inverse=True)
+        self.piece_arc = self.piece_arc.reshape(-1)
+        self.piece_edge, _ = expand_ranges(n_slabs)
+        n_arcs = self.piece_arc.max() + 1
+
+        # arc ends: pieces next to a critical level component or a critical end vertex
+        critical = ~regular
+        bottom_pieces = np.concatenate([below[critical] + 1, slab_offsets[:-1][self.node_of_vertex[lo] >= 0]])
+        bottom_nodes = np.concatenate([level_node[critical], self.node_of_vertex[lo][self.node_of_vertex[lo] >= 0]])
+        top_pieces = np.concatenate([below[critical], slab_offsets[1:][self.node_of_vertex[hi] >= 0] - 1])
+        top_nodes = np.concatenate([level_node[critical], self.node_of_vertex[hi][self.node_of_vertex[hi] >= 0]])
+
+        self.arcs = np.full((n_arcs, 2), -1, dtype=np.int64)
+        for column, pieces, nodes in ((0, bottom_pieces, bottom_nodes), (1, top_pieces, top_nodes)):
+            pairs = np.unique(np.stack([self.piece_arc[pieces], nodes], axis=1), axis=0)
+            if len(pairs) != n_arcs or (np.bincount(pairs[:, 0], minlength=n_arcs) != 1).any():
+                raise Exception("Reeb graph arcs without unique end nodes, the mesh is degenerate.")
+            self.arcs[pairs[:, 0], column] = pairs[:, 1]
+
+        # regular vertices are inside the lowest slab of their upper edges
+        self.vertex_arc = np.full(n_vertices, -1, dtype=np.int64)
+        upper = np.flatnonzero(self.node_of_vertex[lo] < 0)
+        self.vertex_arc[lo[upper]] = self.piece_arc[slab_offsets[upper]]
+
+        # arc -> mesh edges with a piece on it
+        arc_edges = np.unique(np.stack([self.piece_arc, self.piece_edge], axis=1), axis=0)
+        self.arc_edge_offsets = np.searchsorted(arc_edges[:, 0], np.arange(n_arcs + 1))
+        self.arc_edges = arc_edges[:, 1]
+        logger.info(f"Reeb graph: {n_nodes} nodes, {n_arcs} arcs, {self.n_loops} loops")
+
+    @property
+    def n_loops(self):
+        """Cycle rank, the genus for closed orientable surfaces"""
+        n_components = len(np.unique(union_labels(self.arcs[:, 0], self.arcs[:, 1], len(self.nodes))))
+        return len(self.arcs) - len(self.nodes) + n_components
+
+    def edges_of_arc(self, arc: int):
+        return self.arc_edges[self.arc_edge_offsets[arc]:self.arc_edge_offsets[arc + 1]]
+
+    def level_edges(self, arc: int, node: int):
+        """Mesh edges crossing the level just above node on arc"""
+        edges = self.edges_of_arc(arc)
+        slab = node + 1
+        crossing = (self.ranks[self.edges[edges, 0]] <= self.ranks[self.nodes[node]]) & (self.slab_hi[edges] >= slab)
+        edges = edges[crossing]
+        return edges[self.piece_arc[self.slab_offsets[edges] + slab - self.slab_lo[edges]] == arc]
@@ -0,0 +1,41 @@
+from mesh_cut.reeb_loop.reeb import ReebGraph
+from mesh_cut.reeb_loop.loops import ReebLoops
+from mesh_cut.handle_loop.graphbase import GraphBase
+from mesh_cut.handle_loop.linalg import XorBasis, pack_z2_vector
+import numpy as np
+import unittest
+import openmesh as om
+
+class ReebTest(unittest.TestCase):
+    def setUp(self) -> None:
+        MESH_BASEPATH = "./meshes"
+
+        self.meshes = {
+            'genus0': (om.read_trimesh(f"{MESH_BASEPATH}/Genus0.obj"), 0),
+            'genus1': (om.read_trimesh(f"{MESH_BASEPATH}/Genus1.obj"), 1),
+            'genus2': (om.read_trimesh(f"{MESH_BASEPATH}/Genus2.obj"), 2)
+        }
+
+    def test_reeb_graph(self):
+        for name, (mesh, genus) in self.meshes.items():
+            for direction in (None, [1.0, 0.0, 0.0], [0.3, -0.5, 0.8]):
+                reeb = ReebGraph(mesh.points(), mesh.fv_indices(), direction)
+                self.assertEqual(reeb.n_loops, genus)
+                self.assertTrue((reeb.ranks[reeb.nodes[reeb.arcs[:, 0]]] < reeb.ranks[reeb.nodes[reeb.arcs[:, 1]]]).all())
+                self.assertTrue((reeb.vertex_arc[reeb.node_of_vertex < 0] >= 0).all())
+
+    def test_reeb_basis(self):
+        for name, (mesh, genus) in self.meshes.items():
+            if genus == 0:
+                continue
+            graphBase = GraphBase.from_openmesh(mesh)
+            for direction in (None, [0.3, -0.5, 0.8]):
+                cycles = ReebLoops(mesh.points(), mesh.fv_indices(), direction).compute_basis()
+                self.assertEqual(len(cycles), 2 * genus)
+
+                xor_basis = XorBasis(2 * genus)
+                for cycle_length, path, annotation in cycles:
+                    self.assertEqual(path[0], path[-1])
+                    self.assertTrue((graphBase.edge_index(path[:-1], path[1:]) >= 0).all())
+                    self.assertTrue(np.isclose(cycle_length, graphBase.get_path_length(path)))
+                    self.assertTrue(xor_basis.insert(pack_z2_vector(annotation)))